@@ -1,28 +1,18 @@
-from flask import Flask, redirect
+from flask import Flask, jsonify, redirect
 from flask_migrate import Migrate
-from config import Config
+from config import Config, engine_options
 from extensions import db, jwt
 from flask_cors import CORS
-from flasgger import Swagger
+from sqlalchemy import event
 
-app = Flask(__name__)
-app.config.from_object(Config)
+import compression
+import instrumentation
+from commands import init_db_cli, recurring_cli, rollup_cli, search_cli, seed_categories_cli
+from services import identity, insights, recurring, serializers
+from services.blocklist import blocklist
+from services.categories import category_cache
 
-CORS(app,
-     resources={r"/api/*": {"origins": "*"}},
-     supports_credentials=False,
-     allow_headers=["Content-Type", "Authorization"],
-     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"]
-)
-
-db.init_app(app)
-jwt.init_app(app)
-migrate = Migrate(app, db)
-
-app.config['SWAGGER'] = {
-    'title': 'Spentwise API',
-    'uiversion': 3
-}
+migrate = Migrate()
 
 swagger_config = {
     "headers": [],
@@ -58,31 +48,82 @@ swagger_template = {
     }
 }
 
-swagger = Swagger(app, config=swagger_config, template=swagger_template)
 
-from models import models
-from models.models import Category
-from routes import routes_bp
+def init_swagger(app):
+    # Imported here so workers with SWAGGER_ENABLED=false never load flasgger.
+    from flasgger import Swagger
+
+    app.config['SWAGGER'] = {
+        'title': 'Spentwise API',
+        'uiversion': 3
+    }
+    Swagger(app, config=swagger_config, template=swagger_template)
+
+
+def init_engine(app):
+    """Apply SQLITE_PRAGMAS to each new SQLite connection."""
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = app.config['SQLITE_PRAGMAS']
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def create_app(config=Config):
+    """Build the Flask app. No database work happens here; run `flask init-db` for that."""
+    app = Flask(__name__)
+    app.config.from_object(config)
+
+    CORS(app,
+         resources={r"/api/*": {"origins": "*"}},
+         supports_credentials=False,
+         allow_headers=["Content-Type", "Authorization"],
+         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"]
+    )
+
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    db.init_app(app)
+    init_engine(app)
+    jwt.init_app(app)
+    migrate.init_app(app, db)
+
+    if app.config['SWAGGER_ENABLED']:
+        init_swagger(app)
+
+    from models import models
+    from routes import routes_bp
+
+    app.register_blueprint(routes_bp, url_prefix='/api')
+    category_cache.init_app(app)
+    identity.init_app(app)
+    insights.init_app(app)
+    blocklist.init_app(app)
+    app.cli.add_command(init_db_cli)
+    app.cli.add_command(seed_categories_cli)
+    app.cli.add_command(rollup_cli)
+    app.cli.add_command(recurring_cli)
+    app.cli.add_command(search_cli)
+    recurring.init_app(app)
+    serializers.init_app(app)
+    # after_request hooks run in reverse order, so instrumentation sees the compressed body.
+    instrumentation.init_app(app)
+    compression.init_app(app)
 
-app.register_blueprint(routes_bp, url_prefix='/api')
+    @app.route('/')
+    def index():
+        if app.config['SWAGGER_ENABLED']:
+            return redirect('/apidocs/')
+        return jsonify({"message": "Welcome to the Budget Smart API"})
 
-# Auto initialize database on startup
-with app.app_context():
-    db.create_all()
-    categories = [
-        'Housing', 'Transportation', 'Food', 'Health & Medical',
-        'Debt Payments', 'Savings & Investments', 'Personal & Family',
-        'Entertainment & Leisure', 'Education', 'Gifts & Donations', 'Miscellaneous'
-    ]
-    for name in categories:
-        existing = Category.query.filter_by(name=name).first()
-        if not existing:
-            db.session.add(Category(name=name))
-    db.session.commit()
+    return app
 
-@app.route('/')
-def index():
-    return redirect('/apidocs/')
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
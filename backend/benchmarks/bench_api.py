@@ -0,0 +1,92 @@
+"""pytest-benchmark microbenchmarks for the hottest API routes.
+
+Not collected by the regular test run. Point DATABASE_URL at a SQLite file or
+a local PostgreSQL database and run:
+
+    python -m pytest benchmarks/bench_api.py --benchmark-json=benchmarks/results/sqlite.json
+
+Compare a later run against a saved baseline with --benchmark-compare.
+BENCH_USERS and BENCH_EXPENSES size the synthetic dataset generated on first use.
+"""
+import os
+import tempfile
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'spentwise-bench.db'))
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from app import create_app
+from db.synthetic import PASSWORD, generate
+from extensions import db
+from models.models import Expense, User
+from services.categories import seed_categories
+
+BENCH_USERS = int(os.environ.get('BENCH_USERS', 200))
+BENCH_EXPENSES = int(os.environ.get('BENCH_EXPENSES', 50000))
+
+app = create_app()
+
+
+@pytest.fixture(scope='module')
+def heavy_user():
+    """The synthetic user with the most expenses, generating the dataset if needed."""
+    with app.app_context():
+        db.create_all()
+        seed_categories()
+        existing = db.session.scalar(
+            db.select(db.func.count()).select_from(User).where(User.username.like('synthetic%'))
+        )
+        if not existing:
+            generate(BENCH_USERS, BENCH_EXPENSES)
+        user_id, _ = db.session.execute(
+            db.select(Expense.user_id, db.func.count().label('n'))
+            .group_by(Expense.user_id).order_by(db.desc('n')).limit(1)
+        ).one()
+        email = db.session.get(User, user_id).email
+        month = db.session.scalar(db.select(db.func.max(Expense.date)).where(Expense.user_id == user_id))
+    return {'email': email, 'month': month.strftime('%Y-%m')}
+
+
+@pytest.fixture(scope='module')
+def client():
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture(scope='module')
+def headers(client, heavy_user):
+    response = client.post('/api/login', json={'email': heavy_user['email'], 'password': PASSWORD})
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+def _ok(response):
+    assert response.status_code < 300, response.get_data(as_text=True)
+    return response
+
+
+def test_dashboard_month(benchmark, client, headers, heavy_user):
+    benchmark(lambda: _ok(client.get(f"/api/dashboard?month={heavy_user['month']}", headers=headers)))
+
+
+def test_dashboard_all_time(benchmark, client, headers):
+    benchmark(lambda: _ok(client.get('/api/dashboard?breakdown=category', headers=headers)))
+
+
+def test_get_expenses_month(benchmark, client, headers, heavy_user):
+    benchmark(lambda: _ok(client.get(f"/api/expenses?month={heavy_user['month']}", headers=headers)))
+
+
+def test_get_expenses_page(benchmark, client, headers):
+    benchmark(lambda: _ok(client.get('/api/expenses?limit=50', headers=headers)))
+
+
+def test_create_expense(benchmark, client, headers):
+    payload = {'category_id': 1, 'amount': 250, 'date': '2026-05-11', 'description': 'Benchmark'}
+    benchmark(lambda: _ok(client.post('/api/expenses', json=payload, headers=headers)))
+
+
+def test_login(benchmark, client, heavy_user):
+    payload = {'email': heavy_user['email'], 'password': PASSWORD}
+    benchmark(lambda: _ok(client.post('/api/login', json=payload)))
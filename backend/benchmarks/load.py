@@ -0,0 +1,200 @@
+"""Closed-loop HTTP load driver for a running Spentwise API.
+
+Each worker thread logs in as a different synthetic user (see db/synthetic.py)
+and replays a weighted mix of dashboard, listing and create requests over a
+keep-alive connection. Latency percentiles and throughput are printed per
+endpoint and can be saved as a JSON baseline; passing --baseline compares the
+run against an earlier one and exits non-zero on a regression.
+
+    python benchmarks/load.py --url http://localhost:5000/api --concurrency 16 --duration 30 \\
+        --save benchmarks/results/sqlite-load.json
+    python benchmarks/load.py --baseline benchmarks/results/sqlite-load.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+PASSWORD = 'password'
+
+# (name, weight, method, path template, body)
+SCENARIO = (
+    ('dashboard', 35, 'GET', '/dashboard?month={month}', None),
+    ('dashboard_breakdown', 10, 'GET', '/dashboard?month={month}&breakdown=category', None),
+    ('expenses_month', 25, 'GET', '/expenses?month={month}', None),
+    ('expenses_page', 20, 'GET', '/expenses?limit=50', None),
+    ('create_expense', 10, 'POST', '/expenses',
+     {'category_id': 1, 'amount': 120, 'date': '{day}', 'description': 'Load test'}),
+)
+
+
+class Client:
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        connection = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.conn = connection(parts.hostname, parts.port, timeout=timeout)
+        self.prefix = parts.path.rstrip('/')
+        self.headers = {'Content-Type': 'application/json'}
+
+    def request(self, method, path, body=None):
+        payload = json.dumps(body) if body is not None else None
+        self.conn.request(method, self.prefix + path, body=payload, headers=self.headers)
+        response = self.conn.getresponse()
+        data = response.read()
+        return response.status, data
+
+    def login(self, email):
+        status, data = self.request('POST', '/login', {'email': email, 'password': PASSWORD})
+        if status != 200:
+            raise RuntimeError(f'login failed for {email}: {status} {data[:200]!r}')
+        self.headers['Authorization'] = 'Bearer ' + json.loads(data)['token']
+
+
+def _fill(value, month, day):
+    if isinstance(value, str):
+        return value.format(month=month, day=day)
+    if isinstance(value, dict):
+        return {k: _fill(v, month, day) for k, v in value.items()}
+    return value
+
+
+def worker(args, user_id, deadline, results, errors, lock):
+    try:
+        _run_worker(args, user_id, deadline, results, errors, lock)
+    except Exception as e:
+        with lock:
+            errors[1].append(f'worker for synthetic{user_id}: {e}')
+
+
+def _run_worker(args, user_id, deadline, results, errors, lock):
+    rng = random.Random(user_id)
+    client = Client(args.url)
+    client.login(f'synthetic{user_id}@example.com')
+    month = args.month
+    day = f'{month}-15'
+    names = [s[0] for s in SCENARIO]
+    weights = [s[1] for s in SCENARIO]
+    by_name = {s[0]: s for s in SCENARIO}
+    local = {name: [] for name in names}
+    failures = 0
+    while time.perf_counter() < deadline:
+        name, _, method, path, body = by_name[rng.choices(names, weights)[0]]
+        start = time.perf_counter()
+        try:
+            status, _ = client.request(method, _fill(path, month, day), _fill(body, month, day))
+        except (OSError, http.client.HTTPException):
+            client = Client(args.url)
+            client.login(f'synthetic{user_id}@example.com')
+            failures += 1
+            continue
+        elapsed = time.perf_counter() - start
+        if status >= 400:
+            failures += 1
+        else:
+            local[name].append(elapsed)
+    with lock:
+        for name, samples in local.items():
+            results.setdefault(name, []).extend(samples)
+        errors[0] += failures
+
+
+def summarize(samples, elapsed):
+    if len(samples) < 2:
+        return {'requests': len(samples), 'throughput': len(samples) / elapsed}
+    q = statistics.quantiles(samples, n=100)
+    return {
+        'requests': len(samples),
+        'throughput': round(len(samples) / elapsed, 2),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'p50_ms': round(q[49] * 1000, 3),
+        'p95_ms': round(q[94] * 1000, 3),
+        'p99_ms': round(q[98] * 1000, 3),
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Return human readable regressions of ``report`` against ``baseline``."""
+    regressions = []
+    for name, current in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if not previous or 'p95_ms' not in current or 'p95_ms' not in previous:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current['throughput'] < previous['throughput'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput']}/s -> {current['throughput']}/s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000/api')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds')
+    parser.add_argument('--first-user', type=int, default=1,
+                        help='number of the first synthetic user to log in as, as printed by db/synthetic.py')
+    parser.add_argument('--month', default=datetime.now().strftime('%Y-%m'))
+    parser.add_argument('--label', default='', help='free-form tag stored with the results, e.g. sqlite or postgresql')
+    parser.add_argument('--save', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare against a JSON file written by --save')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed relative slowdown (default 0.15)')
+    args = parser.parse_args(argv)
+
+    results, errors, lock = {}, [0, []], threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=worker, args=(args, args.first_user + i, deadline, results, errors, lock))
+        for i in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = {
+        'label': args.label,
+        'url': args.url,
+        'concurrency': args.concurrency,
+        'duration_s': round(elapsed, 2),
+        'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'errors': errors[0],
+        'worker_errors': errors[1],
+        'overall': summarize([s for samples in results.values() for s in samples], elapsed),
+        'endpoints': {name: summarize(samples, elapsed) for name, samples in sorted(results.items())},
+    }
+
+    print(f"{'endpoint':<22}{'req':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in [('overall', report['overall'])] + list(report['endpoints'].items()):
+        print(f"{name:<22}{stats['requests']:>8}{stats['throughput']:>10}"
+              f"{stats.get('p50_ms', '-'):>10}{stats.get('p95_ms', '-'):>10}{stats.get('p99_ms', '-'):>10}")
+    if errors[0]:
+        print(f'{errors[0]} failed requests')
+    for message in errors[1]:
+        print('WORKER FAILED', message)
+    if len(errors[1]) == len(threads):
+        return 1
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print('REGRESSION', line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import click
+from flask.cli import AppGroup, with_appcontext
+
+from extensions import db
+from services import recurring, rollup, search
+from services.categories import seed_categories
+
+
+def _seed_categories():
+    added = seed_categories()
+    click.echo(f'Added {len(added)} categories.' if added else 'Categories already seeded.')
+
+
+@click.command('seed-categories')
+@with_appcontext
+def seed_categories_cli():
+    """Insert the default expense categories that are missing."""
+    _seed_categories()
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_cli():
+    """Create any missing tables and seed the default categories."""
+    db.create_all()
+    search.install()
+    db.session.commit()
+    click.echo('Database tables created.')
+    _seed_categories()
+
+
+rollup_cli = AppGroup('rollup', help='Maintain the monthly_spend rollup table.')
+
+
+@rollup_cli.command('rebuild')
+@click.option('--user-id', type=int, help='Only rebuild buckets for this user.')
+def rollup_rebuild(user_id):
+    """Recompute monthly_spend from the expenses table."""
+    buckets = rollup.rebuild(user_id)
+    db.session.commit()
+    click.echo(f'Rebuilt {buckets} monthly_spend buckets.')
+
+
+@rollup_cli.command('verify')
+@click.option('--user-id', type=int, help='Only verify buckets for this user.')
+def rollup_verify(user_id):
+    """Compare monthly_spend against the expenses table; exits 1 on drift."""
+    mismatches = rollup.verify(user_id)
+    for m in mismatches:
+        click.echo(
+            f"user {m['user_id']} {m['month']} category {m['category_id']}: "
+            f"expected {m['expected']['total']} ({m['expected']['count']}), "
+            f"found {m['actual']['total']} ({m['actual']['count']})"
+        )
+    if mismatches:
+        raise SystemExit(1)
+    click.echo('monthly_spend is consistent with expenses.')
+
+
+recurring_cli = AppGroup('recurring', help='Materialize recurring expenses and budget templates.')
+
+
+@recurring_cli.command('run')
+@click.option('--through', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Materialize occurrences up to this date (default today).')
+def recurring_run(through):
+    """Create the expenses and budgets that are due. Safe to run from several hosts."""
+    expenses, budgets = recurring.run(through.date() if through else None)
+    click.echo(f'Created {expenses} recurring expenses and {budgets} budgets.')
+
+
+search_cli = AppGroup('search', help='Maintain the expense description search index.')
+
+
+@search_cli.command('rebuild')
+def search_rebuild():
+    """Re-index all expense descriptions."""
+    search.rebuild()
+    db.session.commit()
+    click.echo('Search index rebuilt.')
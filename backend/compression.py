@@ -0,0 +1,56 @@
+"""Response compression.
+
+JSON and text responses of at least ``COMPRESS_MIN_SIZE`` bytes are encoded
+with brotli when the client accepts it and the ``brotli`` package is
+installed, otherwise with gzip. Streamed responses (exports) are left alone
+so they keep flowing chunk by chunk.
+"""
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+
+def _encoding_for(request):
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def init_app(app):
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+    brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+
+    @app.after_request
+    def compress(response):
+        if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or not (response.mimetype or '').startswith(COMPRESSIBLE_TYPES)):
+            return response
+        response.vary.add('Accept-Encoding')
+        if response.content_length is None or response.content_length < min_size:
+            return response
+        encoding = _encoding_for(request)
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if encoding == 'br':
+            data = brotli.compress(data, quality=brotli_quality)
+        else:
+            data = gzip.compress(data, compresslevel=gzip_level, mtime=0)
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        return response
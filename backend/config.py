@@ -11,6 +11,86 @@ class Config:
         DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
     SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Server database pool, per process. Keep DB_POOL_SIZE + DB_MAX_OVERFLOW at
+    # or above the requests a worker serves at once; recycle connections before
+    # the server drops them.
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    # Applied to every SQLite connection. WAL lets readers run alongside a
+    # writer's commit; NORMAL sync is durable across app crashes in WAL mode.
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024)),
+    }
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'you-will-never-guess'
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
\ No newline at end of file
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
+    # Logged-out tokens are remembered until they expire. Past MAX_SIZE live entries
+    # logouts go only to Redis, or get a 503 without it. Set a Redis URL to share
+    # revocations between workers (requires the redis package).
+    JWT_BLOCKLIST_MAX_SIZE = int(os.environ.get('JWT_BLOCKLIST_MAX_SIZE', 100000))
+    JWT_BLOCKLIST_REDIS_URL = os.environ.get('JWT_BLOCKLIST_REDIS_URL')
+    # Any werkzeug method string, e.g. 'scrypt' or 'pbkdf2:sha256:600000'.
+    # Existing hashes are upgraded to it on the next successful login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    # Max password hashes computed at once per process; callers wait up to
+    # PASSWORD_HASH_TIMEOUT seconds for a slot before getting a 503.
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 5))
+    # Per-worker cache of token users; profile changes reach other workers within the TTL.
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    # Seconds a worker may serve cached categories before re-reading them.
+    CATEGORY_CACHE_TTL = int(os.environ.get('CATEGORY_CACHE_TTL', 300))
+    # Shared cache object for categories (anything with get/set/delete, set from a
+    # config subclass) so writes invalidate every worker; None caches per worker.
+    CATEGORY_CACHE_BACKEND = None
+    # Per-request query counts/timings, Server-Timing headers and /api/_metrics.
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() != 'false'
+    # Scrapers send it as 'Authorization: Bearer <token>'; /api/_metrics answers 404 while unset.
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Statements slower than this are logged to spentwise.slow_query.
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+    # Per-worker memo of /api/reports/insights results; any write by the user invalidates theirs.
+    INSIGHTS_CACHE_SIZE = int(os.environ.get('INSIGHTS_CACHE_SIZE', 512))
+    INSIGHTS_CACHE_TTL = int(os.environ.get('INSIGHTS_CACHE_TTL', 600))
+    # Seconds between in-process runs of the recurring expense/budget scheduler.
+    # 0 disables the thread; run `flask recurring run` from cron instead.
+    RECURRING_INTERVAL = int(os.environ.get('RECURRING_INTERVAL', 0))
+    # New schedules may have at most this many occurrences already in the past.
+    RECURRING_MAX_CATCHUP = int(os.environ.get('RECURRING_MAX_CATCHUP', 366))
+    # 'orjson' encodes responses with orjson (same bytes, less CPU); 'default' uses the stdlib.
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
+    # Compress JSON/text responses of at least COMPRESS_MIN_SIZE bytes (brotli if installed, else gzip).
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() != 'false'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+    # Serve Swagger UI at /apidocs/. Disable in production to skip loading flasgger.
+    SWAGGER_ENABLED = os.environ.get('SWAGGER_ENABLED', 'true').lower() != 'false'
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the dialect in ``SQLALCHEMY_DATABASE_URI``."""
+    if config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        # Flask-SQLAlchemy picks the pool for SQLite; pragmas are set on connect.
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    METRICS_TOKEN = 'test-metrics-token'
@@ -2,12 +2,14 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app import app, db
+from app import create_app
+from extensions import db
 from models.models import User, Budget, Category, Expense
+from services import rollup, versions
 from datetime import date
 
 def seed_data():
-    with app.app_context():
+    with create_app().app_context():
         # Clear existing data
         db.drop_all()
         db.create_all()
@@ -40,6 +42,9 @@ def seed_data():
         expense3 = Expense(user_id=user2.id, category_id=cat_entertainment.id, amount=100.0, date=date(2024,6,3), description='Concert ticket')
 
         db.session.add_all([expense1, expense2, expense3])
+        db.session.flush()
+        rollup.rebuild()
+        versions.backfill([user1.id, user2.id])
         db.session.commit()
 
         print("Database seeded successfully.")
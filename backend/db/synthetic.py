@@ -0,0 +1,130 @@
+"""Generate large synthetic datasets for benchmarks and load tests.
+
+Builds on seed.py: where seed.py creates a handful of hand-written rows, this
+creates thousands of users with years of budgets and expenses using batched
+executemany inserts, then rebuilds the monthly_spend rollup and stamps the
+rows with each user's data version so the sync feed sees them.
+
+    python db/synthetic.py --users 10000 --expenses 1000000 --years 3
+
+Every user's password is ``password`` so load tests can log in as anyone.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from werkzeug.security import generate_password_hash
+
+from extensions import db
+from models.models import Budget, Category, Expense, User
+from services import rollup, versions
+from services.categories import seed_categories
+
+BATCH_SIZE = 10000
+PASSWORD = 'password'
+DESCRIPTIONS = (
+    'Groceries', 'Bus fare', 'Rent', 'Electricity bill', 'Water bill', 'Airtime', 'Lunch',
+    'Fuel', 'School fees', 'Pharmacy', 'Cinema', 'Internet', 'Gift', 'Savings deposit', 'Taxi',
+)
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(db.insert(model), rows[start:start + BATCH_SIZE])
+
+
+def _months(first, count):
+    year, month = first.year, first.month
+    for _ in range(count):
+        yield f'{year:04d}-{month:02d}'
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+
+
+def generate(users=100, expenses=10000, years=2, seed=42, end=None, echo=print):
+    """Append ``users`` users and ``expenses`` expenses spread over ``years`` years.
+
+    Must run inside an app context. Returns the ids of the generated users.
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    start = date(end.year - years, end.month, 1)
+    span_days = (end - start).days
+    category_ids = list(db.session.scalars(db.select(Category.id)))
+    if not category_ids:
+        raise RuntimeError('No categories found; run `flask init-db` first.')
+
+    began = time.perf_counter()
+    # Hashing is deliberately slow, so every synthetic user shares one hash.
+    password_hash = generate_password_hash(PASSWORD)
+    # Ids come from the database so PostgreSQL's users_id_seq stays in step;
+    # names only need to be unique, and no existing user can have an id >= first.
+    first = (db.session.scalar(db.select(db.func.max(User.id))) or 0) + 1
+    user_rows = [
+        {'username': f'synthetic{first + i}', 'email': f'synthetic{first + i}@example.com',
+         'password': password_hash}
+        for i in range(users)
+    ]
+    user_ids = []
+    for offset in range(0, len(user_rows), BATCH_SIZE):
+        user_ids.extend(db.session.scalars(
+            db.insert(User).returning(User.id, sort_by_parameter_order=True),
+            user_rows[offset:offset + BATCH_SIZE],
+        ))
+
+    month_count = years * 12 + 1
+    budget_rows = [
+        {'user_id': user_id, 'month': month, 'amount_cents': rng.randrange(10000, 200000) * 100}
+        for user_id in user_ids
+        for month in _months(start, month_count)
+    ]
+    _insert(Budget, budget_rows)
+
+    # Skew activity so a few heavy users own most of the history, like real accounts.
+    weights = [1 / (rank + 1) for rank in range(len(user_ids))]
+    remaining = expenses
+    while remaining:
+        batch = min(BATCH_SIZE, remaining)
+        owners = rng.choices(user_ids, weights=weights, k=batch)
+        _insert(Expense, [
+            {
+                'user_id': owner,
+                'category_id': rng.choice(category_ids),
+                'amount_cents': int(rng.lognormvariate(6.5, 1.0)) * 100 + rng.randrange(100),
+                'date': start + timedelta(days=rng.randrange(span_days + 1)),
+                'description': rng.choice(DESCRIPTIONS),
+            }
+            for owner in owners
+        ])
+        remaining -= batch
+
+    buckets = rollup.rebuild()
+    versions.backfill(user_ids)
+    db.session.commit()
+    echo(f'Generated {users} users, {len(budget_rows)} budgets, {expenses} expenses '
+         f'and {buckets} rollup buckets in {time.perf_counter() - began:.1f}s.')
+    if users:
+        echo(f'Users synthetic{first}..synthetic{first + users - 1}@example.com; '
+             f'run benchmarks/load.py with --first-user {first}.')
+    return user_ids
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--expenses', type=int, default=1000000)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from app import create_app
+    with create_app().app_context():
+        db.create_all()
+        seed_categories()
+        generate(args.users, args.expenses, args.years, args.seed)
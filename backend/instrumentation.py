@@ -0,0 +1,181 @@
+"""Per-request performance instrumentation.
+
+Counts SQL statements and DB time through SQLAlchemy cursor events, times
+JSON serialization, and reports both per response (``Server-Timing``) and in
+aggregate at ``/api/_metrics`` in the Prometheus text format. The metrics
+endpoint is only served to requests bearing ``METRICS_TOKEN``. Statements
+slower than ``SLOW_QUERY_THRESHOLD_MS`` are logged with the route that issued
+them.
+
+Metrics are kept per process; with several gunicorn workers each scrape sees
+the worker that answered it.
+"""
+import hmac
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from flask import Response, abort, g, has_request_context, request
+from sqlalchemy import event
+
+from extensions import db
+
+slow_query_log = logging.getLogger('spentwise.slow_query')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _EndpointStats:
+    __slots__ = ('buckets', 'count', 'latency', 'queries', 'db_time', 'serialize_time', 'response_bytes')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.latency = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.response_bytes = 0
+
+
+class Metrics:
+    def __init__(self):
+        self._stats = defaultdict(_EndpointStats)
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, method, status, latency, queries, db_time, serialize_time, response_bytes):
+        with self._lock:
+            stats = self._stats[(endpoint, method, status)]
+            stats.buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+            stats.count += 1
+            stats.latency += latency
+            stats.queries += queries
+            stats.db_time += db_time
+            stats.serialize_time += serialize_time
+            stats.response_bytes += response_bytes
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._stats.items())
+            lines = [
+                '# HELP spentwise_request_duration_seconds Request latency by endpoint.',
+                '# TYPE spentwise_request_duration_seconds histogram',
+            ]
+            for (endpoint, method, status), stats in items:
+                labels = f'endpoint="{endpoint}",method="{method}",status="{status}"'
+                cumulative = 0
+                for bound, hits in zip(LATENCY_BUCKETS + ('+Inf',), stats.buckets):
+                    cumulative += hits
+                    lines.append(f'spentwise_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'spentwise_request_duration_seconds_sum{{{labels}}} {stats.latency:.6f}')
+                lines.append(f'spentwise_request_duration_seconds_count{{{labels}}} {stats.count}')
+
+            counters = (
+                ('spentwise_db_queries_total', 'SQL statements executed.', 'queries', '{}'),
+                ('spentwise_db_seconds_total', 'Time spent executing SQL.', 'db_time', '{:.6f}'),
+                ('spentwise_serialization_seconds_total', 'Time spent encoding JSON.', 'serialize_time', '{:.6f}'),
+                ('spentwise_response_bytes_total', 'Response body bytes sent, after compression.', 'response_bytes', '{}'),
+            )
+            for name, help_text, attr, fmt in counters:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for (endpoint, method, status), stats in items:
+                    labels = f'endpoint="{endpoint}",method="{method}",status="{status}"'
+                    lines.append(f'{name}{{{labels}}} ' + fmt.format(getattr(stats, attr)))
+        return '\n'.join(lines) + '\n'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    # so it does not skew the next timing on this pooled connection.
+    starts = context.connection.info.get('query_start') if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if not has_request_context():
+        return
+    g.query_count = g.get('query_count', 0) + 1
+    g.db_time = g.get('db_time', 0.0) + elapsed
+    threshold = g.get('slow_query_threshold')
+    if threshold is not None and elapsed * 1000 >= threshold:
+        slow_query_log.warning(
+            'slow query %.1f ms on %s %s (%s): %s',
+            elapsed * 1000, request.method, request.path, request.endpoint, statement
+        )
+
+
+def _timed_dumps(dumps):
+    def wrapper(obj, **kwargs):
+        if not has_request_context():
+            return dumps(obj, **kwargs)
+        start = time.perf_counter()
+        try:
+            return dumps(obj, **kwargs)
+        finally:
+            g.serialize_time = g.get('serialize_time', 0.0) + time.perf_counter() - start
+    return wrapper
+
+
+def init_app(app):
+    """Register instrumentation hooks.
+
+    Call after the JSON provider is configured and before compression, so
+    that the size recorded is that of the compressed body.
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    metrics = Metrics()
+    app.extensions['metrics'] = metrics
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(db.engine, 'handle_error', _handle_error)
+    app.json.dumps = _timed_dumps(app.json.dumps)
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+        g.slow_query_threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS')
+
+    @app.after_request
+    def record_timings(response):
+        start = g.get('request_start')
+        if start is None:
+            return response
+        latency = time.perf_counter() - start
+        queries = g.get('query_count', 0)
+        db_time = g.get('db_time', 0.0)
+        serialize_time = g.get('serialize_time', 0.0)
+        size = 0 if response.is_streamed else response.calculate_content_length() or 0
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={db_time * 1000:.2f};desc="{queries} queries", '
+            f'serialize;dur={serialize_time * 1000:.2f}, '
+            f'total;dur={latency * 1000:.2f}'
+        )
+        # Let the cross-origin frontend read Server-Timing in its devtools/Resource Timing.
+        response.headers.setdefault('Timing-Allow-Origin', '*')
+        metrics.observe(request.endpoint or 'unmatched', request.method, response.status_code,
+                        latency, queries, db_time, serialize_time, size)
+        return response
+
+    def metrics_view():
+        token = app.config.get('METRICS_TOKEN')
+        if not token:
+            abort(404)
+        sent = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(sent.encode(), token.encode()):
+            abort(401)
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/api/_metrics', 'metrics', metrics_view)
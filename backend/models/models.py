@@ -1,21 +1,54 @@
 from extensions import db
-from datetime import date
+from datetime import date, datetime
+from sqlalchemy.ext.hybrid import hybrid_property
+from services.money import DEFAULT_CURRENCY, from_cents, to_cents
+
+class MoneyMixin:
+    # Amounts are stored in integer minor units; `amount` is the decimal view the API uses.
+    amount_cents = db.Column(db.BigInteger, nullable=False)
+    currency = db.Column(db.String(3), nullable=False, default=DEFAULT_CURRENCY)
+
+    @hybrid_property
+    def amount(self):
+        return from_cents(self.amount_cents)
+
+    @amount.setter
+    def amount(self, value):
+        self.amount_cents = to_cents(value)
+
+    @amount.expression
+    def amount(cls):
+        return cls.amount_cents / 100.0
+
+class SyncMixin:
+    # The owner's data_version at the write that last touched the row, stamped by
+    # services.versions.bump. Any UPDATE resets it to NULL so the next bump restamps it.
+    seq = db.Column(db.Integer, onupdate=db.null())
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class User(db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password = db.Column(db.String(128), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
+    # Bumped on every budget/expense write; list endpoints derive ETags from it.
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    data_updated_at = db.Column(db.DateTime)
     budgets = db.relationship('Budget', backref='user', lazy=True)
     expenses = db.relationship('Expense', backref='user', lazy=True)
 
-class Budget(db.Model):
+class Budget(MoneyMixin, SyncMixin, db.Model):
     __tablename__ = 'budgets'
+    __table_args__ = (
+        db.Index('ix_budgets_user_id_month_category_id', 'user_id', 'month', 'category_id'),
+        db.Index('ix_budgets_user_id_seq', 'user_id', 'seq'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
     month = db.Column(db.String(7))  # Format: YYYY-MM
+    # NULL for a budget covering the whole month rather than one category.
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)
 
 class Category(db.Model):
     __tablename__ = 'categories'
@@ -23,11 +56,67 @@ class Category(db.Model):
     name = db.Column(db.String(64), unique=True, nullable=False)
     expenses = db.relationship('Expense', backref='category', lazy=True)
 
-class Expense(db.Model):
+class Expense(MoneyMixin, SyncMixin, db.Model):
     __tablename__ = 'expenses'
+    __table_args__ = (
+        db.Index('ix_expenses_user_id_date', 'user_id', 'date'),
+        db.Index('ix_expenses_user_id_category_id_date', 'user_id', 'category_id', 'date'),
+        db.Index('ix_expenses_user_id_seq', 'user_id', 'seq'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
     date = db.Column(db.Date, nullable=False, default=date.today)
     description = db.Column(db.String(255))
+
+class MonthlySpend(db.Model):
+    """Per user, month and category expense totals maintained by services.rollup."""
+    __tablename__ = 'monthly_spend'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)  # Format: YYYY-MM
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), primary_key=True)
+    total_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class ScheduleMixin:
+    # RRULE subset (see services.schedules); occurrences are numbered from start_date.
+    rule = db.Column(db.String(255), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    # How many occurrences have been materialized, and the date of the next one (NULL once finished).
+    occurrences = db.Column(db.Integer, nullable=False, default=0)
+    next_date = db.Column(db.Date)
+
+class RecurringExpense(MoneyMixin, ScheduleMixin, db.Model):
+    __tablename__ = 'recurring_expenses'
+    __table_args__ = (
+        db.Index('ix_recurring_expenses_next_date', 'next_date'),
+        db.Index('ix_recurring_expenses_user_id', 'user_id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
+    description = db.Column(db.String(255))
+
+class BudgetTemplate(MoneyMixin, ScheduleMixin, db.Model):
+    """Creates a Budget for the month of each occurrence."""
+    __tablename__ = 'budget_templates'
+    __table_args__ = (
+        db.Index('ix_budget_templates_next_date', 'next_date'),
+        db.Index('ix_budget_templates_user_id', 'user_id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)
+
+class SyncTombstone(db.Model):
+    """A deleted expense or budget, kept so sync clients can drop their copy."""
+    __tablename__ = 'sync_tombstones'
+    __table_args__ = (
+        db.Index('ix_sync_tombstones_user_id_seq', 'user_id', 'seq'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    kind = db.Column(db.String(16), nullable=False)  # 'expense' or 'budget'
+    row_id = db.Column(db.Integer, nullable=False)
+    seq = db.Column(db.Integer)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -1,14 +1,113 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, abort, request, jsonify, stream_with_context
 from extensions import db
-from models.models import User, Budget, Category, Expense
+from models.models import User, Budget, BudgetTemplate, Category, Expense, RecurringExpense
+from services import (
+    aggregates, batch, exports, identity, imports, insights, pagination, recurring, rollup, search,
+    serializers, sync, versions,
+)
+from services.blocklist import BlocklistFull, blocklist
+from services.categories import category_cache
+from services.dates import month_range_filter, parse_date, parse_month, shift_month
+from services.passwords import HasherBusy, hasher
+from services.money import from_cents, normalize_currency, to_cents
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import (
-    create_access_token, jwt_required, get_jwt_identity
+    current_user, jwt_required, get_jwt, get_jwt_identity
 )
 
 routes_bp = Blueprint('routes', __name__)
 
+MAX_TREND_MONTHS = 120
+
+
+def _export_response(name, chunks, fields):
+    fmt = request.args.get('format', 'csv')
+    if fmt not in exports.FORMATS:
+        return jsonify({'error': 'Invalid format. Use csv or ndjson.'}), 400
+    response = Response(stream_with_context(exports.encode(chunks, fields, fmt)), mimetype=exports.FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={name}.{fmt}'
+    return response
+
+
+def _list_validators(user_id):
+    """Return (etag, last_modified, fresh) for the current per-user list request."""
+    etag, last_modified = versions.validators(user_id, request.full_path)
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    else:
+        since = request.if_modified_since
+        fresh = last_modified is not None and since is not None and last_modified <= since
+    return etag, last_modified, fresh
+
+
+def _with_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def _not_modified(etag, last_modified):
+    return _with_validators(Response(status=304), etag, last_modified)
+
+
+def _filter_expenses(query, args):
+    """Apply the month/from/to/category_id/min_amount/max_amount filters; returns (query, error)."""
+    month = args.get('month')
+    if month:
+        if not _valid_month(month):
+            return query, 'Invalid month format. Use YYYY-MM.'
+        query = query.where(month_range_filter(Expense.date, month))
+    try:
+        if args.get('from'):
+            query = query.where(Expense.date >= datetime.strptime(args['from'], '%Y-%m-%d').date())
+        if args.get('to'):
+            query = query.where(Expense.date <= datetime.strptime(args['to'], '%Y-%m-%d').date())
+    except ValueError:
+        return query, 'Invalid date format. Use YYYY-MM-DD.'
+    category_id = args.get('category_id', type=int)
+    if category_id is not None:
+        query = query.where(Expense.category_id == category_id)
+    try:
+        if args.get('min_amount'):
+            query = query.where(Expense.amount_cents >= to_cents(args['min_amount']))
+        if args.get('max_amount'):
+            query = query.where(Expense.amount_cents <= to_cents(args['max_amount']))
+    except ValueError:
+        return query, 'min_amount and max_amount must be numbers.'
+    return query, None
+
+
+def _valid_category(category_id):
+    return isinstance(category_id, int) and not isinstance(category_id, bool) and category_cache.exists(category_id)
+
+
+def _valid_budget_category(category_id):
+    return category_id is None or _valid_category(category_id)
+
+
+def _valid_month(month):
+    try:
+        parse_month(month)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+@routes_bp.errorhandler(HasherBusy)
+def handle_hasher_busy(e):
+    response = jsonify({'error': 'Server is busy, please retry.'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+@routes_bp.errorhandler(BlocklistFull)
+def handle_blocklist_full(e):
+    response = jsonify({'error': 'Could not log out right now, please retry.'})
+    response.headers['Retry-After'] = '60'
+    return response, 503
+
 @routes_bp.route('/<path:path>', methods=['OPTIONS'])
 def handle_options(path):
     return jsonify({}), 200
@@ -61,12 +160,12 @@ def register():
     if existing_user:
         return jsonify({'error': 'Username or email already exists.'}), 400
 
+    hashed_password = hasher.hash(data['password'])
     try:
-        hashed_password = generate_password_hash(data['password'])
         user = User(username=data['username'], email=data['email'], password=hashed_password)
         db.session.add(user)
         db.session.commit()
-        token = create_access_token(identity=str(user.id))
+        token = identity.issue_token(user)
         return jsonify({
             'token': token,
             'user': {'id': user.id, 'username': user.username, 'email': user.email}
@@ -105,8 +204,12 @@ def login():
         return jsonify({'error': 'Email and password are required.'}), 400
 
     user = User.query.filter_by(email=data['email']).first()
-    if user and check_password_hash(user.password, data['password']):
-        token = create_access_token(identity=str(user.id))
+    if user and hasher.verify(user.password, data['password']):
+        if hasher.needs_rehash(user.password):
+            # Upgrade hashes made with outdated parameters while we have the plaintext.
+            user.password = hasher.hash(data['password'])
+            db.session.commit()
+        token = identity.issue_token(user)
         return jsonify({
             'token': token,
             'user': {'id': user.id, 'username': user.username, 'email': user.email}
@@ -127,7 +230,11 @@ def logout():
     responses:
       200:
         description: Logged out successfully
+      503:
+        description: Too many live revocations to remember another; retry later
     """
+    token = get_jwt()
+    blocklist.revoke(token['jti'], token['exp'])
     return jsonify({'message': 'Logged out successfully'})
 
 
@@ -147,9 +254,8 @@ def get_current_user():
       200:
         description: Returns current user details
     """
-    user_id = int(get_jwt_identity())
-    user = User.query.get_or_404(user_id)
-    return jsonify({'id': user.id, 'username': user.username, 'email': user.email})
+    # Resolved by the JWT user loader, normally from the identity cache.
+    return jsonify({'id': current_user.id, 'username': current_user.username, 'email': current_user.email})
 
 
 @routes_bp.route('/users/me', methods=['PUT'])
@@ -178,13 +284,14 @@ def update_current_user():
         description: User updated successfully
     """
     user_id = int(get_jwt_identity())
-    user = User.query.get_or_404(user_id)
+    user = db.get_or_404(User, user_id)
     data = request.get_json()
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
     if data.get('password'):
-        user.password = generate_password_hash(data['password'])
+        user.password = hasher.hash(data['password'])
     db.session.commit()
+    identity.invalidate(user_id)
     return jsonify({'id': user.id, 'username': user.username, 'email': user.email})
 
 
@@ -203,9 +310,16 @@ def delete_current_user():
         description: User deleted successfully
     """
     user_id = int(get_jwt_identity())
-    user = User.query.get_or_404(user_id)
+    user = db.get_or_404(User, user_id)
     db.session.delete(user)
     db.session.commit()
+    identity.invalidate(user_id)
+    token = get_jwt()
+    try:
+        blocklist.revoke(token['jti'], token['exp'])
+    except BlocklistFull:
+        # The user is gone, so the token already fails the user lookup.
+        pass
     return jsonify({'message': 'User deleted'})
 
 
@@ -226,8 +340,40 @@ def get_budgets():
         description: List of budgets
     """
     user_id = int(get_jwt_identity())
-    budgets = Budget.query.filter_by(user_id=user_id).all()
-    return jsonify([{'id': b.id, 'user_id': b.user_id, 'amount': b.amount, 'month': b.month} for b in budgets])
+    etag, last_modified, fresh = _list_validators(user_id)
+    if fresh:
+        return _not_modified(etag, last_modified)
+    budgets = db.session.execute(db.select(*serializers.BUDGET_COLUMNS).where(Budget.user_id == user_id))
+    return _with_validators(jsonify([serializers.budget_dict(row) for row in budgets]), etag, last_modified)
+
+
+@routes_bp.route('/budgets/export', methods=['GET'])
+@jwt_required()
+def export_budgets():
+    """
+    Export all budgets for current user
+    ---
+    tags:
+      - Budgets
+    security:
+      - Bearer: []
+    produces:
+      - text/csv
+      - application/x-ndjson
+    parameters:
+      - in: query
+        name: format
+        type: string
+        enum: [csv, ndjson]
+        default: csv
+    responses:
+      200:
+        description: Streamed file of budgets
+      400:
+        description: Unsupported format
+    """
+    user_id = int(get_jwt_identity())
+    return _export_response('budgets', exports.budget_rows(user_id), exports.BUDGET_FIELDS)
 
 
 @routes_bp.route('/budgets/<int:budget_id>', methods=['GET'])
@@ -253,7 +399,7 @@ def get_budget(budget_id):
     """
     user_id = int(get_jwt_identity())
     budget = Budget.query.filter_by(id=budget_id, user_id=user_id).first_or_404()
-    return jsonify({'id': budget.id, 'user_id': budget.user_id, 'amount': budget.amount, 'month': budget.month})
+    return jsonify(serializers.budget_dict(budget))
 
 
 @routes_bp.route('/budgets', methods=['POST'])
@@ -278,16 +424,33 @@ def create_budget():
             month:
               type: string
               example: "2026-05"
+            category_id:
+              type: integer
+              description: Omit for an overall budget for the month
     responses:
       201:
         description: Budget created successfully
+      400:
+        description: Invalid amount, month or category
     """
     user_id = int(get_jwt_identity())
     data = request.get_json()
-    budget = Budget(user_id=user_id, amount=data['amount'], month=data['month'])
+    try:
+        amount_cents = to_cents(data['amount'])
+        currency = normalize_currency(data.get('currency'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not _valid_month(data.get('month')):
+        return jsonify({'error': 'Invalid month format. Use YYYY-MM.'}), 400
+    category_id = data.get('category_id')
+    if not _valid_budget_category(category_id):
+        return jsonify({'error': 'Invalid category_id.'}), 400
+    budget = Budget(user_id=user_id, amount_cents=amount_cents, currency=currency,
+                    month=shift_month(data['month'], 0), category_id=category_id)
     db.session.add(budget)
+    versions.bump(user_id)
     db.session.commit()
-    return jsonify({'id': budget.id, 'user_id': budget.user_id, 'amount': budget.amount, 'month': budget.month}), 201
+    return jsonify(serializers.budget_dict(budget)), 201
 
 
 @routes_bp.route('/budgets/<int:budget_id>', methods=['PUT'])
@@ -313,17 +476,34 @@ def update_budget(budget_id):
               type: number
             month:
               type: string
+            category_id:
+              type: integer
+              description: null turns it into an overall budget
     responses:
       200:
         description: Budget updated successfully
+      400:
+        description: Invalid amount, month or category
     """
     user_id = int(get_jwt_identity())
     budget = Budget.query.filter_by(id=budget_id, user_id=user_id).first_or_404()
     data = request.get_json()
-    budget.amount = data.get('amount', budget.amount)
-    budget.month = data.get('month', budget.month)
+    if 'amount' in data:
+        try:
+            budget.amount_cents = to_cents(data['amount'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    if 'category_id' in data:
+        if not _valid_budget_category(data['category_id']):
+            return jsonify({'error': 'Invalid category_id.'}), 400
+        budget.category_id = data['category_id']
+    if 'month' in data:
+        if not _valid_month(data['month']):
+            return jsonify({'error': 'Invalid month format. Use YYYY-MM.'}), 400
+        budget.month = shift_month(data['month'], 0)
+    versions.bump(user_id)
     db.session.commit()
-    return jsonify({'id': budget.id, 'user_id': budget.user_id, 'amount': budget.amount, 'month': budget.month})
+    return jsonify(serializers.budget_dict(budget))
 
 
 @routes_bp.route('/budgets/<int:budget_id>', methods=['DELETE'])
@@ -348,6 +528,8 @@ def delete_budget(budget_id):
     user_id = int(get_jwt_identity())
     budget = Budget.query.filter_by(id=budget_id, user_id=user_id).first_or_404()
     db.session.delete(budget)
+    sync.record_deletion(budget)
+    versions.bump(user_id)
     db.session.commit()
     return jsonify({'message': 'Budget deleted'})
 
@@ -367,9 +549,16 @@ def get_categories():
     responses:
       200:
         description: List of categories
+      304:
+        description: Categories unchanged since the ETag sent in If-None-Match
     """
-    categories = Category.query.all()
-    return jsonify([{'id': c.id, 'name': c.name} for c in categories])
+    snapshot = category_cache.snapshot()
+    if request.if_none_match.contains(snapshot.etag):
+        response = Response(status=304)
+    else:
+        response = jsonify([{'id': category_id, 'name': name} for category_id, name in snapshot.rows])
+    response.set_etag(snapshot.etag)
+    return response
 
 
 @routes_bp.route('/categories/<int:category_id>', methods=['GET'])
@@ -391,8 +580,10 @@ def get_category(category_id):
       200:
         description: Category details
     """
-    category = Category.query.get_or_404(category_id)
-    return jsonify({'id': category.id, 'name': category.name})
+    name = category_cache.snapshot().by_id.get(category_id)
+    if name is None:
+        abort(404)
+    return jsonify({'id': category_id, 'name': name})
 
 
 @routes_bp.route('/categories', methods=['POST'])
@@ -427,6 +618,7 @@ def create_category():
     category = Category(name=data['name'])
     db.session.add(category)
     db.session.commit()
+    category_cache.invalidate()
     return jsonify({'id': category.id, 'name': category.name}), 201
 
 
@@ -459,6 +651,7 @@ def update_category(category_id):
     data = request.get_json()
     category.name = data.get('name', category.name)
     db.session.commit()
+    category_cache.invalidate()
     return jsonify({'id': category.id, 'name': category.name})
 
 
@@ -484,6 +677,7 @@ def delete_category(category_id):
     category = Category.query.get_or_404(category_id)
     db.session.delete(category)
     db.session.commit()
+    category_cache.invalidate()
     return jsonify({'message': 'Category deleted'})
 
 
@@ -493,7 +687,7 @@ def delete_category(category_id):
 @jwt_required()
 def get_expenses():
     """
-    Get all expenses for current user
+    Get expenses for current user
     ---
     tags:
       - Expenses
@@ -505,24 +699,189 @@ def get_expenses():
         type: string
         example: "2026-05"
         description: Filter expenses by month (YYYY-MM)
+      - in: query
+        name: from
+        type: string
+        example: "2026-05-01"
+        description: Only expenses on or after this date (YYYY-MM-DD)
+      - in: query
+        name: to
+        type: string
+        example: "2026-05-31"
+        description: Only expenses on or before this date (YYYY-MM-DD)
+      - in: query
+        name: category_id
+        type: integer
+      - in: query
+        name: min_amount
+        type: number
+      - in: query
+        name: max_amount
+        type: number
+      - in: query
+        name: sort
+        type: string
+        enum: [date, amount]
+        description: Sort key for paginated results (default date)
+      - in: query
+        name: order
+        type: string
+        enum: [asc, desc]
+        description: Sort order for paginated results (default desc)
+      - in: query
+        name: limit
+        type: integer
+        description: Page size (max 500). Enables paginated responses.
+      - in: query
+        name: cursor
+        type: string
+        description: next_cursor from the previous page
     responses:
       200:
-        description: List of expenses
+        description: >
+          List of expenses. When limit or cursor is given the response is
+          an object with expenses and next_cursor instead.
+      400:
+        description: Invalid filter or cursor
     """
     user_id = int(get_jwt_identity())
-    month = request.args.get('month')
-    query = Expense.query.filter_by(user_id=user_id)
-    if month:
-        query = query.filter(db.func.strftime('%Y-%m', Expense.date) == month)
-    expenses = query.all()
-    return jsonify([{
-        'id': e.id,
-        'user_id': e.user_id,
-        'category_id': e.category_id,
-        'amount': e.amount,
-        'date': e.date.isoformat(),
-        'description': e.description
-    } for e in expenses])
+    etag, last_modified, fresh = _list_validators(user_id)
+    if fresh:
+        return _not_modified(etag, last_modified)
+    args = request.args
+    query, error = _filter_expenses(db.select(*serializers.EXPENSE_COLUMNS).where(Expense.user_id == user_id), args)
+    if error:
+        return jsonify({'error': error}), 400
+
+    if 'limit' not in args and 'cursor' not in args:
+        expenses = db.session.execute(query)
+        return _with_validators(jsonify([serializers.expense_dict(row) for row in expenses]), etag, last_modified)
+
+    sort = args.get('sort', 'date')
+    order = args.get('order', 'desc')
+    if sort not in ('date', 'amount') or order not in ('asc', 'desc'):
+        return jsonify({'error': 'Invalid sort. Use sort=date|amount and order=asc|desc.'}), 400
+    limit = args.get('limit', pagination.DEFAULT_PAGE_SIZE, type=int)
+    if limit < 1:
+        return jsonify({'error': 'limit must be a positive integer.'}), 400
+    limit = min(limit, pagination.MAX_PAGE_SIZE)
+
+    sort_column = Expense.date if sort == 'date' else Expense.amount_cents
+    after = None
+    if args.get('cursor'):
+        try:
+            value, last_id = pagination.decode_cursor(args['cursor'], sort, order)
+            if sort == 'date':
+                value = datetime.strptime(value, '%Y-%m-%d').date()
+        except (pagination.InvalidCursor, TypeError, ValueError):
+            return jsonify({'error': 'Invalid cursor.'}), 400
+        after = (value, last_id)
+
+    expenses = db.session.execute(
+        pagination.keyset_page(query, sort_column, Expense.id, order, limit, after)
+    ).all()
+    next_cursor = None
+    if len(expenses) > limit:
+        expenses = expenses[:limit]
+        last = expenses[-1]
+        value = last.date.isoformat() if sort == 'date' else last.amount_cents
+        next_cursor = pagination.encode_cursor(sort, order, value, last.id)
+    return _with_validators(jsonify({
+        'expenses': [serializers.expense_dict(row) for row in expenses],
+        'next_cursor': next_cursor
+    }), etag, last_modified)
+
+
+@routes_bp.route('/expenses/search', methods=['GET'])
+@jwt_required()
+def search_expenses():
+    """
+    Search expense descriptions, best match first
+    ---
+    tags:
+      - Expenses
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: q
+        type: string
+        required: true
+        example: "java caf"
+        description: Words to look for; each matches as a prefix and all must match
+      - in: query
+        name: limit
+        type: integer
+        description: Maximum results (default 50, max 500)
+      - in: query
+        name: month
+        type: string
+        description: Filter by month (YYYY-MM)
+      - in: query
+        name: from
+        type: string
+        description: Only expenses on or after this date (YYYY-MM-DD)
+      - in: query
+        name: to
+        type: string
+        description: Only expenses on or before this date (YYYY-MM-DD)
+      - in: query
+        name: category_id
+        type: integer
+      - in: query
+        name: min_amount
+        type: number
+      - in: query
+        name: max_amount
+        type: number
+    responses:
+      200:
+        description: Matching expenses as {expenses}
+      400:
+        description: Missing query or invalid filters
+    """
+    user_id = int(get_jwt_identity())
+    args = request.args
+    words = search.terms(args.get('q'))
+    if not words:
+        return jsonify({'error': 'q must contain at least one word.'}), 400
+    limit = args.get('limit', pagination.DEFAULT_PAGE_SIZE, type=int)
+    if limit < 1:
+        return jsonify({'error': 'limit must be a positive integer.'}), 400
+    query, error = _filter_expenses(db.select(*serializers.EXPENSE_COLUMNS), args)
+    if error:
+        return jsonify({'error': error}), 400
+    query = search.search_expenses(query, user_id, words, min(limit, pagination.MAX_PAGE_SIZE))
+    return jsonify({'expenses': [serializers.expense_dict(row) for row in db.session.execute(query)]})
+
+
+@routes_bp.route('/expenses/export', methods=['GET'])
+@jwt_required()
+def export_expenses():
+    """
+    Export all expenses for current user
+    ---
+    tags:
+      - Expenses
+    security:
+      - Bearer: []
+    produces:
+      - text/csv
+      - application/x-ndjson
+    parameters:
+      - in: query
+        name: format
+        type: string
+        enum: [csv, ndjson]
+        default: csv
+    responses:
+      200:
+        description: Streamed file of expenses
+      400:
+        description: Unsupported format
+    """
+    user_id = int(get_jwt_identity())
+    return _export_response('expenses', exports.expense_rows(user_id), exports.EXPENSE_FIELDS)
 
 
 @routes_bp.route('/expenses/<int:expense_id>', methods=['GET'])
@@ -546,14 +905,7 @@ def get_expense(expense_id):
     """
     user_id = int(get_jwt_identity())
     expense = Expense.query.filter_by(id=expense_id, user_id=user_id).first_or_404()
-    return jsonify({
-        'id': expense.id,
-        'user_id': expense.user_id,
-        'category_id': expense.category_id,
-        'amount': expense.amount,
-        'date': expense.date.isoformat(),
-        'description': expense.description
-    })
+    return jsonify(serializers.expense_dict(expense))
 
 
 @routes_bp.route('/expenses', methods=['POST'])
@@ -599,41 +951,103 @@ def create_expense():
             return jsonify({'error': f'Missing required field: {field}'}), 400
 
     date_str = data.get('date')
-    date_obj = None
     if date_str:
-        for fmt in ('%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y'):
-            try:
-                date_obj = datetime.strptime(date_str, fmt).date()
-                break
-            except ValueError:
-                continue
-        if not date_obj:
+        try:
+            date_obj = parse_date(date_str)
+        except ValueError:
             return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD.'}), 400
     else:
         date_obj = datetime.utcnow().date()
 
+    try:
+        amount_cents = to_cents(data['amount'])
+        currency = normalize_currency(data.get('currency'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     expense = Expense(
         user_id=user_id,
         category_id=data['category_id'],
-        amount=data['amount'],
+        amount_cents=amount_cents,
+        currency=currency,
         date=date_obj,
         description=data.get('description', '')
     )
     try:
         db.session.add(expense)
+        rollup.add_expense(expense)
+        versions.bump(user_id)
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to save expense'}), 500
 
-    return jsonify({
-        'id': expense.id,
-        'user_id': expense.user_id,
-        'category_id': expense.category_id,
-        'amount': expense.amount,
-        'date': expense.date.isoformat(),
-        'description': expense.description
-    }), 201
+    return jsonify(serializers.expense_dict(expense)), 201
+
+
+@routes_bp.route('/expenses/bulk', methods=['POST'])
+@jwt_required()
+def bulk_create_expenses():
+    """
+    Import many expenses at once
+    ---
+    tags:
+      - Expenses
+    security:
+      - Bearer: []
+    consumes:
+      - application/json
+      - application/x-ndjson
+      - text/csv
+    parameters:
+      - in: body
+        name: body
+        required: true
+        description: >
+          A JSON array of expenses, one JSON expense per line (NDJSON), or a
+          CSV file with a header row of category_id,amount,date,description.
+        schema:
+          type: array
+          items:
+            properties:
+              category_id:
+                type: integer
+                example: 1
+              amount:
+                type: number
+                example: 500
+              date:
+                type: string
+                example: "2026-05-11"
+              description:
+                type: string
+                example: Grocery shopping
+    responses:
+      201:
+        description: Valid rows imported; errors lists rejected rows
+      400:
+        description: Unreadable body or no valid rows
+    """
+    user_id = int(get_jwt_identity())
+    try:
+        rows = imports.read_rows(request.stream, request.content_type, request.get_json(silent=True))
+        valid, errors = imports.validate_rows(user_id, rows)
+    except imports.ImportFormatError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if not valid:
+        return jsonify({'error': 'No valid expenses to import.', 'created': 0, 'errors': errors}), 400
+
+    try:
+        imports.insert_expenses(valid)
+        rollup.add_rows(valid)
+        versions.bump(user_id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to import expenses'}), 500
+
+    return jsonify({'created': len(valid), 'errors': errors}), 201
 
 
 @routes_bp.route('/expenses/<int:expense_id>', methods=['PUT'])
@@ -669,21 +1083,24 @@ def update_expense(expense_id):
     """
     user_id = int(get_jwt_identity())
     expense = Expense.query.filter_by(id=expense_id, user_id=user_id).first_or_404()
+    old_key, old_amount_cents = rollup.expense_key(expense), expense.amount_cents
     data = request.get_json()
     expense.category_id = data.get('category_id', expense.category_id)
-    expense.amount = data.get('amount', expense.amount)
+    if 'amount' in data:
+        try:
+            expense.amount_cents = to_cents(data['amount'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
     if 'date' in data:
-        expense.date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+        try:
+            expense.date = parse_date(data['date'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD.'}), 400
     expense.description = data.get('description', expense.description)
+    rollup.move_expense(old_key, old_amount_cents, expense)
+    versions.bump(user_id)
     db.session.commit()
-    return jsonify({
-        'id': expense.id,
-        'user_id': expense.user_id,
-        'category_id': expense.category_id,
-        'amount': expense.amount,
-        'date': expense.date.isoformat(),
-        'description': expense.description
-    })
+    return jsonify(serializers.expense_dict(expense))
 
 
 @routes_bp.route('/expenses/<int:expense_id>', methods=['DELETE'])
@@ -708,10 +1125,253 @@ def delete_expense(expense_id):
     user_id = int(get_jwt_identity())
     expense = Expense.query.filter_by(id=expense_id, user_id=user_id).first_or_404()
     db.session.delete(expense)
+    rollup.remove_expense(expense)
+    sync.record_deletion(expense)
+    versions.bump(user_id)
     db.session.commit()
     return jsonify({'message': 'Expense deleted'})
 
 
+# ─── RECURRING ───────────────────────────────────────────────────────────────
+
+@routes_bp.route('/recurring-expenses', methods=['GET'])
+@jwt_required()
+def get_recurring_expenses():
+    """
+    Get recurring expenses for current user
+    ---
+    tags:
+      - Recurring
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: List of recurring expenses
+    """
+    user_id = int(get_jwt_identity())
+    schedules = RecurringExpense.query.filter_by(user_id=user_id).order_by(RecurringExpense.id).all()
+    return jsonify([serializers.recurring_expense_dict(s) for s in schedules])
+
+
+@routes_bp.route('/recurring-expenses', methods=['POST'])
+@jwt_required()
+def create_recurring_expense():
+    """
+    Create a recurring expense
+    ---
+    tags:
+      - Recurring
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          properties:
+            category_id:
+              type: integer
+              example: 2
+            amount:
+              type: number
+              example: 25000
+            description:
+              type: string
+              example: "Rent"
+            rule:
+              type: string
+              example: "FREQ=MONTHLY;BYMONTHDAY=1"
+              description: RRULE subset (FREQ, INTERVAL, BYMONTHDAY, COUNT, UNTIL)
+            start_date:
+              type: string
+              example: "2026-05-01"
+              description: >
+                Defaults to today. Occurrences already past are created
+                immediately; at most RECURRING_MAX_CATCHUP (default 366) of them.
+    responses:
+      201:
+        description: Recurring expense created
+      400:
+        description: Missing fields, invalid rule, amount or date
+    """
+    user_id = int(get_jwt_identity())
+    data = request.get_json()
+    for field in ('category_id', 'amount', 'rule'):
+        if field not in data:
+            return jsonify({'error': f'Missing required field: {field}'}), 400
+    if not _valid_category(data['category_id']):
+        return jsonify({'error': 'Invalid category_id.'}), 400
+    try:
+        start_date = parse_date(data['start_date']) if data.get('start_date') else datetime.utcnow().date()
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD.'}), 400
+    try:
+        amount_cents = to_cents(data['amount'])
+        currency = normalize_currency(data.get('currency'))
+        _, next_date = recurring.first_occurrence(data['rule'], start_date)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    schedule = RecurringExpense(
+        user_id=user_id,
+        category_id=data['category_id'],
+        amount_cents=amount_cents,
+        currency=currency,
+        description=data.get('description', ''),
+        rule=data['rule'],
+        start_date=start_date,
+        next_date=next_date
+    )
+    db.session.add(schedule)
+    if recurring.catch_up(schedule):
+        versions.bump(user_id)
+    db.session.commit()
+    return jsonify(serializers.recurring_expense_dict(schedule)), 201
+
+
+@routes_bp.route('/recurring-expenses/<int:schedule_id>', methods=['DELETE'])
+@jwt_required()
+def delete_recurring_expense(schedule_id):
+    """
+    Stop a recurring expense. Expenses it already created are kept.
+    ---
+    tags:
+      - Recurring
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: schedule_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Recurring expense deleted
+    """
+    user_id = int(get_jwt_identity())
+    schedule = RecurringExpense.query.filter_by(id=schedule_id, user_id=user_id).first_or_404()
+    db.session.delete(schedule)
+    db.session.commit()
+    return jsonify({'message': 'Recurring expense deleted'})
+
+
+@routes_bp.route('/budget-templates', methods=['GET'])
+@jwt_required()
+def get_budget_templates():
+    """
+    Get budget templates for current user
+    ---
+    tags:
+      - Recurring
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: List of budget templates
+    """
+    user_id = int(get_jwt_identity())
+    templates = BudgetTemplate.query.filter_by(user_id=user_id).order_by(BudgetTemplate.id).all()
+    return jsonify([serializers.budget_template_dict(t) for t in templates])
+
+
+@routes_bp.route('/budget-templates', methods=['POST'])
+@jwt_required()
+def create_budget_template():
+    """
+    Create a budget template that adds a budget every month (or as its rule says)
+    ---
+    tags:
+      - Recurring
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          properties:
+            amount:
+              type: number
+              example: 10000
+            category_id:
+              type: integer
+              description: Omit for an overall budget
+            rule:
+              type: string
+              example: "FREQ=MONTHLY"
+              description: FREQ=MONTHLY or FREQ=YEARLY, with optional INTERVAL, COUNT and UNTIL. Defaults to FREQ=MONTHLY.
+            start_month:
+              type: string
+              example: "2026-05"
+              description: Defaults to the current month
+    responses:
+      201:
+        description: Budget template created
+      400:
+        description: Invalid amount, category, rule or month
+    """
+    user_id = int(get_jwt_identity())
+    data = request.get_json()
+    if 'amount' not in data:
+        return jsonify({'error': 'Missing required field: amount'}), 400
+    category_id = data.get('category_id')
+    if not _valid_budget_category(category_id):
+        return jsonify({'error': 'Invalid category_id.'}), 400
+    start_month = data.get('start_month') or datetime.utcnow().strftime('%Y-%m')
+    if not _valid_month(start_month):
+        return jsonify({'error': 'Invalid month format. Use YYYY-MM.'}), 400
+    rule_text = data.get('rule') or 'FREQ=MONTHLY'
+    try:
+        amount_cents = to_cents(data['amount'])
+        currency = normalize_currency(data.get('currency'))
+        rule, next_date = recurring.first_occurrence(rule_text, parse_month(start_month))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if rule.freq not in ('MONTHLY', 'YEARLY') or rule.bymonthday is not None:
+        return jsonify({'error': 'Budget templates use FREQ=MONTHLY or FREQ=YEARLY without BYMONTHDAY.'}), 400
+
+    template = BudgetTemplate(
+        user_id=user_id,
+        category_id=category_id,
+        amount_cents=amount_cents,
+        currency=currency,
+        rule=rule_text,
+        start_date=parse_month(start_month),
+        next_date=next_date
+    )
+    db.session.add(template)
+    if recurring.catch_up(template):
+        versions.bump(user_id)
+    db.session.commit()
+    return jsonify(serializers.budget_template_dict(template)), 201
+
+
+@routes_bp.route('/budget-templates/<int:template_id>', methods=['DELETE'])
+@jwt_required()
+def delete_budget_template(template_id):
+    """
+    Delete a budget template. Budgets it already created are kept.
+    ---
+    tags:
+      - Recurring
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: template_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Budget template deleted
+    """
+    user_id = int(get_jwt_identity())
+    template = BudgetTemplate.query.filter_by(id=template_id, user_id=user_id).first_or_404()
+    db.session.delete(template)
+    db.session.commit()
+    return jsonify({'message': 'Budget template deleted'})
+
+
 # ─── DASHBOARD ───────────────────────────────────────────────────────────────
 
 @routes_bp.route('/dashboard', methods=['GET'])
@@ -730,29 +1390,283 @@ def dashboard():
         type: string
         example: "2026-05"
         description: Filter by month (YYYY-MM)
+      - in: query
+        name: breakdown
+        type: string
+        enum: [category, day]
+        description: Include spending grouped by category or by day
     responses:
       200:
         description: Dashboard summary with total budget, spent and remaining
     """
     user_id = int(get_jwt_identity())
     month = request.args.get('month')
-
-    budget_query = Budget.query.filter_by(user_id=user_id)
-    expense_query = Expense.query.filter_by(user_id=user_id)
-
+    breakdown = request.args.get('breakdown')
+    if month and not _valid_month(month):
+        return jsonify({'error': 'Invalid month format. Use YYYY-MM.'}), 400
     if month:
-        budget_query = budget_query.filter_by(month=month)
-        expense_query = expense_query.filter(
-            db.func.strftime('%Y-%m', Expense.date) == month
-        )
+        month = shift_month(month, 0)
+    if breakdown and breakdown not in aggregates.BREAKDOWNS:
+        return jsonify({'error': 'Invalid breakdown. Use category or day.'}), 400
 
-    total_budget = sum(b.amount for b in budget_query.all())
-    total_spent = sum(e.amount for e in expense_query.all())
-    remaining = total_budget - total_spent
+    budget_cents, spent_cents = aggregates.dashboard_totals(user_id, month)
 
-    return jsonify({
+    summary = {
         'month': month or 'all',
-        'total_budget': total_budget,
-        'total_spent': total_spent,
-        'remaining': remaining
-    })
\ No newline at end of file
+        'total_budget': from_cents(budget_cents),
+        'total_spent': from_cents(spent_cents),
+        'remaining': from_cents(budget_cents - spent_cents)
+    }
+    if breakdown:
+        summary['breakdown'] = aggregates.BREAKDOWNS[breakdown](user_id, month)
+    return jsonify(summary)
+
+
+# ─── REPORTS ─────────────────────────────────────────────────────────────────
+
+@routes_bp.route('/reports/trend', methods=['GET'])
+@jwt_required()
+def trend_report():
+    """
+    Get budget vs spent per month over a range of months
+    ---
+    tags:
+      - Reports
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: from
+        type: string
+        example: "2026-01"
+        description: First month (YYYY-MM). Defaults to 11 months before to.
+      - in: query
+        name: to
+        type: string
+        example: "2026-12"
+        description: Last month (YYYY-MM). Defaults to the current month.
+      - in: query
+        name: group
+        type: string
+        enum: [category]
+        description: Also return spending per month and category
+    responses:
+      200:
+        description: >
+          Parallel arrays of months, budget and spent. With group=category,
+          categories holds parallel month, category_id and spent arrays.
+      400:
+        description: Invalid month range
+    """
+    user_id = int(get_jwt_identity())
+    last_month = request.args.get('to') or datetime.utcnow().strftime('%Y-%m')
+    first_month = request.args.get('from')
+    if not _valid_month(last_month) or (first_month and not _valid_month(first_month)):
+        return jsonify({'error': 'Invalid month format. Use YYYY-MM.'}), 400
+    # Normalise e.g. 2026-5 to 2026-05 so string comparisons on month work.
+    last_month = shift_month(last_month, 0)
+    first_month = shift_month(first_month, 0) if first_month else shift_month(last_month, -11)
+    if first_month > last_month:
+        return jsonify({'error': 'from must not be after to.'}), 400
+    if first_month < shift_month(last_month, -(MAX_TREND_MONTHS - 1)):
+        return jsonify({'error': f'Ranges are limited to {MAX_TREND_MONTHS} months.'}), 400
+
+    group = request.args.get('group')
+    if group not in (None, 'category'):
+        return jsonify({'error': 'Invalid group. Use category.'}), 400
+
+    report = aggregates.trend(user_id, first_month, last_month, by_category=group == 'category')
+    return jsonify({'from': first_month, 'to': last_month, **report})
+
+
+@routes_bp.route('/reports/budget-vs-actual', methods=['GET'])
+@jwt_required()
+def budget_vs_actual_report():
+    """
+    Compare each budget in a month with what was actually spent
+    ---
+    tags:
+      - Reports
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: month
+        type: string
+        example: "2026-05"
+        description: Month (YYYY-MM). Defaults to the current month.
+    responses:
+      200:
+        description: >
+          One entry per budget with budget, spent, remaining, percent_used and
+          overspent. Overall budgets (category_id null) come first and are
+          compared with all spending in the month.
+      400:
+        description: Invalid month
+    """
+    user_id = int(get_jwt_identity())
+    month = request.args.get('month') or datetime.utcnow().strftime('%Y-%m')
+    if not _valid_month(month):
+        return jsonify({'error': 'Invalid month format. Use YYYY-MM.'}), 400
+    month = shift_month(month, 0)
+    return jsonify({'month': month, 'budgets': aggregates.budget_vs_actual(user_id, month)})
+
+
+@routes_bp.route('/reports/insights', methods=['GET'])
+@jwt_required()
+def insights_report():
+    """
+    Spending statistics and unusual expenses for a month
+    ---
+    tags:
+      - Reports
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: month
+        type: string
+        example: "2026-05"
+        description: Month (YYYY-MM). Defaults to the current month.
+    responses:
+      200:
+        description: >
+          Rolling daily averages, amount percentiles and an end-of-month
+          projection over the 12 months up to month, month-over-month change
+          per category, and outlier expenses in month (z-score or IQR within
+          their category).
+      400:
+        description: Invalid month
+    """
+    user_id = int(get_jwt_identity())
+    month = request.args.get('month') or datetime.utcnow().strftime('%Y-%m')
+    if not _valid_month(month):
+        return jsonify({'error': 'Invalid month format. Use YYYY-MM.'}), 400
+    return jsonify(insights.insights(user_id, shift_month(month, 0)))
+
+
+# ─── BATCH ───────────────────────────────────────────────────────────────────
+
+@routes_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def run_batch():
+    """
+    Create, update and delete expenses and budgets in one transaction
+    ---
+    tags:
+      - Batch
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          properties:
+            mode:
+              type: string
+              enum: [atomic, best_effort]
+              default: atomic
+              description: >
+                atomic applies all operations or none; best_effort keeps the
+                ones that succeed.
+            operations:
+              type: array
+              description: Up to 500 operations, applied in order
+              items:
+                properties:
+                  op:
+                    type: string
+                    enum: [create, update, delete]
+                  type:
+                    type: string
+                    enum: [expense, budget]
+                  id:
+                    type: integer
+                    description: Required for update and delete
+                  data:
+                    type: object
+                    description: Same fields as the single-item endpoints
+    responses:
+      200:
+        description: >
+          {committed, results}; results has an index, status and data or
+          error for each operation attempted.
+      400:
+        description: Malformed batch, or an atomic batch failed and was rolled back
+      404:
+        description: An atomic batch referenced an item that does not exist
+    """
+    user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object.'}), 400
+    mode = data.get('mode', 'atomic')
+    if mode not in batch.MODES:
+        return jsonify({'error': 'Invalid mode. Use atomic or best_effort.'}), 400
+    operations = data.get('operations')
+    try:
+        batch.validate(operations)
+    except batch.OperationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    committed, results = batch.run(user_id, operations, mode)
+    if not committed:
+        return jsonify({'committed': False, 'results': results}), results[-1]['status']
+    return jsonify({'committed': True, 'results': results})
+
+
+# ─── SYNC ────────────────────────────────────────────────────────────────────
+
+@routes_bp.route('/sync', methods=['GET'])
+@jwt_required()
+def sync_changes():
+    """
+    Expenses and budgets changed since the client's last sync
+    ---
+    tags:
+      - Sync
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: since
+        type: integer
+        default: 0
+        description: seq from the previous response; 0 for a full download
+      - in: query
+        name: limit
+        type: integer
+        default: 1000
+        description: Maximum items (rows plus deleted ids) per page, up to 5000
+      - in: query
+        name: cursor
+        type: string
+        description: cursor from the previous page while has_more is true
+    responses:
+      200:
+        description: >
+          {seq, reset, has_more, cursor, expenses, budgets, deleted: {expenses,
+          budgets}}. expenses and budgets hold rows created or updated after
+          since, deleted the ids removed since; apply deleted first. While
+          has_more is true, call again with cursor; then keep seq for the
+          next sync. When reset is true, replace the local copy instead of
+          merging.
+      400:
+        description: Invalid since, limit or cursor
+    """
+    user_id = int(get_jwt_identity())
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        since = -1
+    if since < 0:
+        return jsonify({'error': 'since must be a non-negative integer.'}), 400
+    limit = request.args.get('limit', sync.DEFAULT_LIMIT, type=int)
+    if limit < 1:
+        return jsonify({'error': 'limit must be a positive integer.'}), 400
+    limit = min(limit, sync.MAX_LIMIT)
+    try:
+        return jsonify(sync.changes(user_id, since, limit, request.args.get('cursor') or None))
+    except pagination.InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
@@ -0,0 +1,166 @@
+from extensions import db
+from models.models import Budget, Expense, MonthlySpend
+from services.categories import category_cache
+from services.dates import month_range_filter, months_between
+from services.money import from_cents
+
+
+def _month_filter(query, column, month):
+    if month:
+        query = query.where(month_range_filter(column, month))
+    return query
+
+
+def _rollup_filter(query, user_id, month):
+    query = query.where(MonthlySpend.user_id == user_id)
+    if month:
+        query = query.where(MonthlySpend.month == month)
+    return query
+
+
+def _month_budget_cents():
+    """A month's budget: its overall budget if it has one, else the sum of its category budgets."""
+    overall = db.func.sum(db.case((Budget.category_id.is_(None), Budget.amount_cents)))
+    return db.func.coalesce(overall, db.func.sum(Budget.amount_cents), 0)
+
+
+def dashboard_totals(user_id, month=None):
+    """Return (budget_cents, spent_cents) for a user in a single round trip.
+
+    Spending is read from the monthly_spend rollup, so the cost grows with
+    months x categories rather than with the number of expenses.
+    """
+    per_month = db.select(_month_budget_cents().label('total')).where(Budget.user_id == user_id).group_by(Budget.month)
+    if month:
+        per_month = per_month.where(Budget.month == month)
+    per_month = per_month.subquery()
+    budget_total = db.select(db.func.coalesce(db.func.sum(per_month.c.total), 0))
+    spent_total = _rollup_filter(db.select(db.func.coalesce(db.func.sum(MonthlySpend.total_cents), 0)), user_id, month)
+
+    row = db.session.execute(
+        db.select(budget_total.scalar_subquery(), spent_total.scalar_subquery())
+    ).one()
+    return int(row[0]), int(row[1])
+
+
+def spend_by_category(user_id, month=None):
+    """Total spent per category, largest first."""
+    query = _rollup_filter(
+        db.select(MonthlySpend.category_id, db.func.sum(MonthlySpend.total_cents).label('total'))
+        .group_by(MonthlySpend.category_id)
+        .order_by(db.desc('total')),
+        user_id, month
+    )
+    names = category_cache.snapshot().by_id
+    return [
+        {'category_id': category_id, 'category': names.get(category_id), 'total': from_cents(total)}
+        for category_id, total in db.session.execute(query)
+    ]
+
+
+def spend_by_day(user_id, month=None):
+    """Total spent per calendar day, oldest first."""
+    query = (
+        db.select(Expense.date, db.func.sum(Expense.amount_cents).label('total'))
+        .where(Expense.user_id == user_id)
+        .group_by(Expense.date)
+        .order_by(Expense.date)
+    )
+    query = _month_filter(query, Expense.date, month)
+    return [
+        {'date': day.isoformat(), 'total': from_cents(total)}
+        for day, total in db.session.execute(query)
+    ]
+
+
+def budget_vs_actual(user_id, month):
+    """Spent, remaining and percentage used for each of a user's budgets in ``month``.
+
+    One grouped query joins the month's budgets (read through the
+    (user_id, month, category_id) index) to the monthly_spend rollup. An
+    overall budget (no category) is compared with the month's total spend.
+    """
+    spent = db.func.coalesce(db.func.sum(MonthlySpend.total_cents), 0)
+    query = (
+        db.select(Budget.id, Budget.category_id, Budget.amount_cents, Budget.currency, spent)
+        .outerjoin(MonthlySpend, db.and_(
+            MonthlySpend.user_id == Budget.user_id,
+            MonthlySpend.month == Budget.month,
+            db.or_(Budget.category_id.is_(None), MonthlySpend.category_id == Budget.category_id),
+        ))
+        .where(Budget.user_id == user_id, Budget.month == month)
+        .group_by(Budget.id, Budget.category_id, Budget.amount_cents, Budget.currency)
+        .order_by(Budget.category_id.is_not(None), Budget.category_id, Budget.id)
+    )
+    names = category_cache.snapshot().by_id
+    rows = []
+    for budget_id, category_id, budget_cents, currency, spent_cents in db.session.execute(query):
+        spent_cents = int(spent_cents)
+        rows.append({
+            'budget_id': budget_id,
+            'category_id': category_id,
+            'category': names.get(category_id) if category_id is not None else None,
+            'currency': currency,
+            'budget': from_cents(budget_cents),
+            'spent': from_cents(spent_cents),
+            'remaining': from_cents(budget_cents - spent_cents),
+            'percent_used': round(spent_cents * 100 / budget_cents, 1) if budget_cents else None,
+            'overspent': spent_cents > budget_cents,
+        })
+    return rows
+
+
+BREAKDOWNS = {
+    'category': spend_by_category,
+    'day': spend_by_day,
+}
+
+
+def trend(user_id, first_month, last_month, by_category=False):
+    """Budget vs spent per month (and optionally per category) as parallel arrays.
+
+    Budgets and rollup buckets are read with one UNION ALL statement whose
+    two halves are range scans over (user_id, month) indexes.
+    """
+    no_category = db.cast(db.null(), db.Integer)
+    group_by = [MonthlySpend.month, MonthlySpend.category_id] if by_category else [MonthlySpend.month]
+    spent = (
+        db.select(MonthlySpend.month, MonthlySpend.category_id if by_category else no_category,
+                  db.func.sum(MonthlySpend.total_cents), db.literal(0, db.BigInteger))
+        .where(MonthlySpend.user_id == user_id, MonthlySpend.month.between(first_month, last_month))
+        .group_by(*group_by)
+    )
+    budgets = (
+        db.select(Budget.month, no_category, db.literal(0, db.BigInteger), _month_budget_cents())
+        .where(Budget.user_id == user_id, Budget.month.between(first_month, last_month))
+        .group_by(Budget.month)
+    )
+
+    months = months_between(first_month, last_month)
+    index = {month: i for i, month in enumerate(months)}
+    budget_cents = [0] * len(months)
+    spent_cents = [0] * len(months)
+    categories = []
+    for month, category_id, spent_total, budget_total in db.session.execute(db.union_all(spent, budgets)):
+        i = index.get(month)
+        if i is None:
+            # Only rows stored before budget months were validated can miss.
+            continue
+        budget_cents[i] += int(budget_total)
+        spent_cents[i] += int(spent_total)
+        if by_category and category_id is not None:
+            categories.append((month, category_id, int(spent_total)))
+
+    result = {
+        'months': months,
+        'budget': [from_cents(c) for c in budget_cents],
+        'spent': [from_cents(c) for c in spent_cents],
+    }
+    if by_category:
+        categories.sort()
+        result['categories'] = {
+            'month': [month for month, _, _ in categories],
+            'category_id': [category_id for _, category_id, _ in categories],
+            'spent': [from_cents(total) for _, _, total in categories],
+        }
+    return result
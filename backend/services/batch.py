@@ -0,0 +1,210 @@
+"""Apply an ordered list of expense and budget operations in one transaction.
+
+Each operation is ``{"op": "create"|"update"|"delete", "type": "expense"|"budget",
+"id": ..., "data": {...}}``. Rows named by update/delete operations are
+loaded up front with one ``id IN (...) AND user_id = ?`` query per type, so
+ownership costs at most two queries whatever the batch size. Rollup deltas
+are collected across the batch and applied once, and the user's data
+version is bumped once.
+
+In ``atomic`` mode the first failing operation rolls everything back. In
+``best_effort`` mode every operation runs in its own savepoint and failures
+only undo that operation.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from extensions import db
+from models.models import Budget, Expense
+from services import rollup, serializers, sync, versions
+from services.categories import category_cache
+from services.dates import parse_date, shift_month
+from services.money import normalize_currency, to_cents
+
+MAX_OPERATIONS = 500
+MODES = ('atomic', 'best_effort')
+OPS = ('create', 'update', 'delete')
+MODELS = {
+    'expense': Expense,
+    'budget': Budget,
+}
+SERIALIZERS = {
+    'expense': serializers.expense_dict,
+    'budget': serializers.budget_dict,
+}
+
+
+class OperationError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _expense_fields(data, creating):
+    if creating:
+        for field in ('category_id', 'amount'):
+            if field not in data:
+                raise OperationError(f'Missing required field: {field}')
+    fields = {}
+    if 'category_id' in data:
+        if not _is_id(data['category_id']) or not category_cache.exists(data['category_id']):
+            raise OperationError('Invalid category_id.')
+        fields['category_id'] = data['category_id']
+    if 'amount' in data:
+        fields['amount_cents'] = to_cents(data['amount'])
+    if creating or 'currency' in data:
+        fields['currency'] = normalize_currency(data.get('currency'))
+    if data.get('date'):
+        try:
+            fields['date'] = parse_date(data['date'])
+        except (TypeError, ValueError):
+            raise OperationError('Invalid date format. Use YYYY-MM-DD.')
+    elif creating:
+        fields['date'] = datetime.utcnow().date()
+    if 'description' in data:
+        if not isinstance(data['description'], (str, type(None))):
+            raise OperationError('description must be a string.')
+        fields['description'] = data['description']
+    elif creating:
+        fields['description'] = ''
+    return fields
+
+
+def _budget_fields(data, creating):
+    if creating:
+        for field in ('amount', 'month'):
+            if field not in data:
+                raise OperationError(f'Missing required field: {field}')
+    fields = {}
+    if 'amount' in data:
+        fields['amount_cents'] = to_cents(data['amount'])
+    if creating or 'currency' in data:
+        fields['currency'] = normalize_currency(data.get('currency'))
+    if 'month' in data:
+        try:
+            fields['month'] = shift_month(data['month'], 0)
+        except (TypeError, ValueError):
+            raise OperationError('Invalid month format. Use YYYY-MM.')
+    if 'category_id' in data:
+        category_id = data['category_id']
+        if category_id is not None and (not _is_id(category_id)
+                                        or not category_cache.exists(category_id)):
+            raise OperationError('Invalid category_id.')
+        fields['category_id'] = data['category_id']
+    return fields
+
+
+FIELDS = {
+    'expense': _expense_fields,
+    'budget': _budget_fields,
+}
+
+
+def validate(operations):
+    """Check the shape of every operation, raising OperationError naming the first bad one."""
+    if not isinstance(operations, list) or not operations:
+        raise OperationError('operations must be a non-empty list.')
+    if len(operations) > MAX_OPERATIONS:
+        raise OperationError(f'Batches are limited to {MAX_OPERATIONS} operations.')
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise OperationError(f'Operation {index} must be an object.')
+        if operation.get('op') not in OPS:
+            raise OperationError(f'Operation {index}: op must be one of {", ".join(OPS)}.')
+        if operation.get('type') not in MODELS:
+            raise OperationError(f'Operation {index}: type must be one of {", ".join(MODELS)}.')
+        if operation['op'] != 'create' and not _is_id(operation.get('id')):
+            raise OperationError(f'Operation {index}: id is required.')
+        if operation['op'] != 'delete' and not isinstance(operation.get('data'), dict):
+            raise OperationError(f'Operation {index}: data must be an object.')
+
+
+def _load_owned(user_id, operations):
+    """Rows referenced by update/delete operations that belong to the user, by (type, id)."""
+    wanted = defaultdict(set)
+    for operation in operations:
+        if operation['op'] != 'create':
+            wanted[operation['type']].add(operation['id'])
+    owned = {}
+    for kind, ids in wanted.items():
+        model = MODELS[kind]
+        for row in db.session.scalars(db.select(model).where(model.id.in_(ids), model.user_id == user_id)):
+            owned[kind, row.id] = row
+    return owned
+
+
+def _add_delta(deltas, key, cents, count):
+    total, n = deltas[key]
+    deltas[key] = (total + cents, n + count)
+
+
+def _apply(user_id, operation, owned, deltas):
+    kind, op = operation['type'], operation['op']
+    model = MODELS[kind]
+    if op == 'create':
+        row = model(user_id=user_id, **FIELDS[kind](operation['data'], creating=True))
+        db.session.add(row)
+    else:
+        row = owned.get((kind, operation['id']))
+        if row is None:
+            raise OperationError(f'{kind.capitalize()} not found.', 404)
+        if kind == 'expense':
+            _add_delta(deltas, rollup.expense_key(row), -row.amount_cents, -1)
+        if op == 'delete':
+            db.session.delete(row)
+            sync.record_deletion(row)
+        else:
+            for name, value in FIELDS[kind](operation['data'], creating=False).items():
+                setattr(row, name, value)
+    db.session.flush()
+    if op == 'delete':
+        del owned[kind, operation['id']]
+        return {'status': 200}
+    if kind == 'expense':
+        _add_delta(deltas, rollup.expense_key(row), row.amount_cents, 1)
+    return {'status': 201 if op == 'create' else 200, 'data': SERIALIZERS[kind](row)}
+
+
+def run(user_id, operations, mode='atomic'):
+    """Apply ``operations`` for ``user_id``; returns ``(committed, results)``.
+
+    ``results`` holds one ``{"index", "status", "data"|"error"}`` entry per
+    operation attempted. Atomic batches stop at the first failure.
+    """
+    owned = _load_owned(user_id, operations)
+    deltas = defaultdict(lambda: (0, 0))
+    results = []
+    changed = False
+    for index, operation in enumerate(operations):
+        savepoint = db.session.begin_nested() if mode == 'best_effort' else None
+        pending = defaultdict(lambda: (0, 0))
+        try:
+            result = _apply(user_id, operation, owned, pending)
+        except (OperationError, ValueError, SQLAlchemyError) as e:
+            if isinstance(e, SQLAlchemyError):
+                e = OperationError('Could not save this operation.')
+            status = getattr(e, 'status', 400)
+            results.append({'index': index, 'status': status, 'error': str(e)})
+            if savepoint is None:
+                db.session.rollback()
+                return False, results
+            savepoint.rollback()
+            continue
+        if savepoint is not None:
+            savepoint.commit()
+        for key, (cents, count) in pending.items():
+            _add_delta(deltas, key, cents, count)
+        changed = True
+        results.append({'index': index, **result})
+
+    if changed:
+        rollup.apply_deltas(deltas)
+        versions.bump(user_id)
+    db.session.commit()
+    return True, results
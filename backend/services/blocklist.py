@@ -0,0 +1,103 @@
+"""Revoked access tokens, keyed by ``jti``.
+
+Revocations are kept in a process-local dict until the token would have
+expired anyway, so memory is bounded by the number of tokens revoked within
+one ``JWT_ACCESS_TOKEN_EXPIRES`` window. The per-request check is a single
+dict lookup. An unexpired revocation is never forgotten: once
+``JWT_BLOCKLIST_MAX_SIZE`` live entries are held, new revocations go only to
+the shared store, or are refused with BlocklistFull when there is none.
+
+With several workers, set ``JWT_BLOCKLIST_REDIS_URL`` so revocations are also
+written to a shared Redis-compatible store (anything speaking the redis-py
+``set(..., ex=)``/``exists`` API, e.g. fakeredis as a local stand-in) and
+checked there when the local set misses.
+"""
+import heapq
+import threading
+import time
+
+from extensions import jwt
+
+
+class BlocklistFull(RuntimeError):
+    pass
+
+
+class LocalBlocklist:
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._expiry = {}
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def add(self, jti, expires_at):
+        """Remember ``jti`` until ``expires_at``; returns False if the cap is reached."""
+        with self._lock:
+            self._purge(time.time())
+            if jti not in self._expiry and len(self._expiry) >= self.maxsize:
+                return False
+            self._expiry[jti] = expires_at
+            heapq.heappush(self._heap, (expires_at, jti))
+            return True
+
+    def contains(self, jti):
+        expires_at = self._expiry.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def _purge(self, now):
+        heap = self._heap
+        # Expired tokens are rejected by signature checks anyway; forget them.
+        while heap and heap[0][0] <= now:
+            expires_at, jti = heapq.heappop(heap)
+            if self._expiry.get(jti) == expires_at:
+                del self._expiry[jti]
+
+    def __len__(self):
+        return len(self._expiry)
+
+
+class RedisBlocklist:
+    def __init__(self, client, prefix='spentwise:revoked:'):
+        self.client = client
+        self.prefix = prefix
+
+    def add(self, jti, expires_at):
+        ttl = int(expires_at - time.time()) + 1
+        if ttl > 0:
+            self.client.set(self.prefix + jti, 1, ex=ttl)
+
+    def contains(self, jti):
+        return bool(self.client.exists(self.prefix + jti))
+
+
+class Blocklist:
+    def __init__(self):
+        self.local = LocalBlocklist()
+        self.shared = None
+
+    def init_app(self, app):
+        self.local.maxsize = app.config.get('JWT_BLOCKLIST_MAX_SIZE', self.local.maxsize)
+        url = app.config.get('JWT_BLOCKLIST_REDIS_URL')
+        if url:
+            import redis
+            self.shared = RedisBlocklist(redis.Redis.from_url(url))
+
+    def revoke(self, jti, expires_at):
+        stored = self.local.add(jti, expires_at)
+        if self.shared is not None:
+            self.shared.add(jti, expires_at)
+        elif not stored:
+            raise BlocklistFull(jti)
+
+    def is_revoked(self, jti):
+        if self.local.contains(jti):
+            return True
+        return self.shared is not None and self.shared.contains(jti)
+
+
+blocklist = Blocklist()
+
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return blocklist.is_revoked(jwt_payload['jti'])
@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalCache:
+    """Thread-safe process-local key/value store with optional per-key expiry.
+
+    It implements the same ``get``/``set``/``delete`` interface as cachelib-style
+    shared caches, so either can back the caches built on top of it.
+    """
+
+    def __init__(self, default_timeout=None):
+        self.default_timeout = default_timeout
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        expires_at = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        return True
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire ``ttl`` seconds after being set.
+
+    Same ``get``/``set``/``delete`` interface as LocalCache; ``set`` accepts a
+    per-entry ``timeout`` overriding ``ttl``.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        expires_at = time.monotonic() + (self.ttl if timeout is None else timeout)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        return True
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,112 @@
+import hashlib
+import json
+
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models.models import Category
+from services.cache import LocalCache
+
+CACHE_KEY = 'categories'
+# Category.id is a 32-bit INTEGER column; larger ids cannot exist (or bind).
+MAX_ID = 2 ** 31 - 1
+
+DEFAULT_CATEGORIES = [
+    'Housing', 'Transportation', 'Food', 'Health & Medical',
+    'Debt Payments', 'Savings & Investments', 'Personal & Family',
+    'Entertainment & Leisure', 'Education', 'Gifts & Donations', 'Miscellaneous'
+]
+
+
+class CategorySnapshot:
+    __slots__ = ('rows', 'by_id', 'etag')
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.by_id = dict(rows)
+        digest = hashlib.sha1(json.dumps(rows).encode()).hexdigest()
+        self.etag = digest[:16]
+
+    def __getstate__(self):
+        return self.rows
+
+    def __setstate__(self, rows):
+        self.__init__(rows)
+
+
+class CategoryCache:
+    """Caches the categories table as an id->name map.
+
+    Categories are tiny and rarely change, so reads are served from the cache
+    and writes call ``invalidate()``. The backend defaults to a process-local
+    store; set ``CATEGORY_CACHE_BACKEND`` to a shared cache (anything with
+    ``get``/``set``/``delete``) so invalidations reach every worker.
+    ``CATEGORY_CACHE_TTL`` bounds staleness for process-local caches.
+    """
+
+    def __init__(self, backend=None, timeout=300):
+        self.backend = backend or LocalCache()
+        self.timeout = timeout
+
+    def init_app(self, app):
+        self.timeout = app.config.get('CATEGORY_CACHE_TTL', self.timeout)
+        self.backend = app.config.get('CATEGORY_CACHE_BACKEND') or LocalCache()
+
+    def snapshot(self):
+        snapshot = self.backend.get(CACHE_KEY)
+        if snapshot is None:
+            rows = [
+                (category_id, name)
+                for category_id, name in db.session.execute(
+                    db.select(Category.id, Category.name).order_by(Category.id)
+                )
+            ]
+            snapshot = CategorySnapshot(rows)
+            self.backend.set(CACHE_KEY, snapshot, timeout=self.timeout)
+        return snapshot
+
+    def exists(self, category_id, snapshot=None):
+        """Whether ``category_id`` names a category, reading the table on a cache miss.
+
+        Another worker's new category is missing from this worker's cache
+        until its TTL runs out, so a miss is confirmed against the database
+        (and drops the stale entry) before an id is rejected.
+        """
+        if category_id in (snapshot or self.snapshot()).by_id:
+            return True
+        if not (isinstance(category_id, int) and 0 < category_id <= MAX_ID):
+            return False
+        if db.session.get(Category, category_id) is None:
+            return False
+        self.invalidate()
+        return True
+
+    def invalidate(self):
+        self.backend.delete(CACHE_KEY)
+
+
+category_cache = CategoryCache()
+
+
+def seed_categories(names=DEFAULT_CATEGORIES):
+    """Insert any missing categories. Idempotent; returns the names it added.
+
+    One ``SELECT ... WHERE name IN (...)`` finds what already exists and the
+    rest go in as a single batched insert. If a concurrent seeder wins the
+    race, the unique constraint rejects the batch and the lookup is retried.
+    """
+    for attempt in range(2):
+        existing = set(db.session.scalars(db.select(Category.name).where(Category.name.in_(names))))
+        missing = [name for name in names if name not in existing]
+        if not missing:
+            return []
+        try:
+            db.session.execute(db.insert(Category), [{'name': name} for name in missing])
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            if attempt:
+                raise
+            continue
+        category_cache.invalidate()
+        return missing
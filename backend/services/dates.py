@@ -0,0 +1,79 @@
+from datetime import date, datetime
+
+from sqlalchemy import String
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+MONTH_FORMAT = '%Y-%m'
+# Accepted expense date formats, tried in order.
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y')
+
+
+def parse_date(value):
+    """Parse an expense date in any of DATE_FORMATS, raising ValueError if none match."""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f'Invalid date: {value!r}')
+
+
+def parse_month(month):
+    """Parse a YYYY-MM string into the first day of that month."""
+    return datetime.strptime(month, MONTH_FORMAT).date()
+
+
+def month_bounds(month):
+    """Return the half-open range [first, next_first) covering a YYYY-MM month."""
+    first = parse_month(month)
+    if first.month == 12:
+        return first, date(first.year + 1, 1, 1)
+    return first, date(first.year, first.month + 1, 1)
+
+
+def shift_month(month, months):
+    """Return the YYYY-MM month ``months`` months after (or before) ``month``."""
+    first = parse_month(month)
+    index = first.year * 12 + first.month - 1 + months
+    return f'{index // 12:04d}-{index % 12 + 1:02d}'
+
+
+def months_between(first_month, last_month):
+    """List every YYYY-MM month from first_month to last_month inclusive."""
+    months, month = [], first_month
+    while month <= last_month:
+        months.append(month)
+        month = shift_month(month, 1)
+    return months
+
+
+def month_range_filter(column, month):
+    """Sargable replacement for ``strftime('%Y-%m', column) == month``.
+
+    Comparing the bare column against a date range lets every dialect use an
+    index range scan on ``column`` instead of evaluating a function per row.
+    """
+    first, next_first = month_bounds(month)
+    return (column >= first) & (column < next_first)
+
+
+class month_of(FunctionElement):
+    """SQL expression rendering a date column as its YYYY-MM month string.
+
+    Meant for GROUP BY and SELECT lists; filter with month_range_filter instead
+    so the date index stays usable.
+    """
+    type = String()
+    inherit_cache = True
+    name = 'month_of'
+
+
+@compiles(month_of)
+def _month_of_default(element, compiler, **kw):
+    return "to_char({}, 'YYYY-MM')".format(compiler.process(element.clauses, **kw))
+
+
+@compiles(month_of, 'sqlite')
+def _month_of_sqlite(element, compiler, **kw):
+    return "strftime('%Y-%m', {})".format(compiler.process(element.clauses, **kw))
@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+
+from extensions import db
+from models.models import Budget, Expense
+from services.money import from_cents
+
+YIELD_PER = 500
+
+EXPENSE_FIELDS = ('id', 'user_id', 'category_id', 'amount', 'currency', 'date', 'description')
+BUDGET_FIELDS = ('id', 'user_id', 'category_id', 'amount', 'currency', 'month')
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _stream_rows(query):
+    """Yield result rows in chunks from a server-side cursor."""
+    result = db.session.execute(query.execution_options(yield_per=YIELD_PER))
+    for partition in result.partitions():
+        yield partition
+
+
+def expense_rows(user_id):
+    query = (
+        db.select(Expense.id, Expense.user_id, Expense.category_id, Expense.amount_cents, Expense.currency,
+                  Expense.date, Expense.description)
+        .where(Expense.user_id == user_id)
+        .order_by(Expense.date, Expense.id)
+    )
+    for partition in _stream_rows(query):
+        yield [
+            (
+                row.id, row.user_id, row.category_id, from_cents(row.amount_cents), row.currency,
+                row.date.isoformat(), row.description
+            )
+            for row in partition
+        ]
+
+
+def budget_rows(user_id):
+    query = (
+        db.select(Budget.id, Budget.user_id, Budget.category_id, Budget.amount_cents, Budget.currency, Budget.month)
+        .where(Budget.user_id == user_id)
+        .order_by(Budget.month, Budget.id)
+    )
+    for partition in _stream_rows(query):
+        yield [
+            (row.id, row.user_id, row.category_id, from_cents(row.amount_cents), row.currency, row.month)
+            for row in partition
+        ]
+
+
+def encode(chunks, fields, fmt):
+    """Encode row chunks as CSV (with a header) or NDJSON, one output chunk per input chunk."""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        yield buffer.getvalue()
+        for chunk in chunks:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(chunk)
+            yield buffer.getvalue()
+    else:
+        for chunk in chunks:
+            yield ''.join(json.dumps(dict(zip(fields, row))) + '\n' for row in chunk)
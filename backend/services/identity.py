@@ -0,0 +1,57 @@
+"""JWT identity handling with a small per-process user cache.
+
+Access tokens carry the username and email as extra claims, and the
+``user_lookup_loader`` resolves the token's user through a TTL/LRU cache,
+so authenticated requests normally run no query just to confirm the user
+exists. Profile updates and deletes must call ``invalidate``; other workers
+pick up the change within ``USER_CACHE_TTL`` seconds.
+"""
+from collections import namedtuple
+
+from flask_jwt_extended import create_access_token
+
+from extensions import db, jwt
+from models.models import User
+from services.cache import TTLCache
+
+CachedUser = namedtuple('CachedUser', ['id', 'username', 'email'])
+
+user_cache = TTLCache()
+
+
+def init_app(app):
+    user_cache.maxsize = app.config.get('USER_CACHE_SIZE', user_cache.maxsize)
+    user_cache.ttl = app.config.get('USER_CACHE_TTL', user_cache.ttl)
+
+
+def _snapshot(user):
+    return CachedUser(user.id, user.username, user.email)
+
+
+def issue_token(user):
+    """Create an access token for ``user`` and prime the cache with it."""
+    user_cache.set(user.id, _snapshot(user))
+    return create_access_token(
+        identity=str(user.id),
+        additional_claims={'username': user.username, 'email': user.email},
+    )
+
+
+def invalidate(user_id):
+    user_cache.delete(user_id)
+
+
+@jwt.user_lookup_loader
+def load_user(jwt_header, jwt_data):
+    user_id = int(jwt_data['sub'])
+    user = user_cache.get(user_id)
+    if user is None:
+        row = db.session.execute(
+            db.select(User.id, User.username, User.email).where(User.id == user_id)
+        ).first()
+        if row is None:
+            # flask_jwt_extended answers 401 for tokens of deleted users.
+            return None
+        user = CachedUser(*row)
+        user_cache.set(user_id, user)
+    return user
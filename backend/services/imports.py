@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from extensions import db
+from models.models import Expense
+from services.categories import category_cache
+from services.dates import parse_date
+from services.money import normalize_currency, to_cents
+
+MAX_IMPORT_ROWS = 10000
+INSERT_BATCH_SIZE = 1000
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def read_rows(stream, content_type, json_body=None):
+    """Yield raw row dicts from a JSON array, NDJSON or CSV request body."""
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    if mimetype in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        return _read_ndjson(stream)
+    if mimetype == 'text/csv':
+        return csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    if json_body is None:
+        raise ImportFormatError('Send a JSON array, NDJSON or CSV body.')
+    if isinstance(json_body, dict):
+        json_body = json_body.get('expenses')
+    if not isinstance(json_body, list):
+        raise ImportFormatError('Expected a JSON array of expenses.')
+    return iter(json_body)
+
+
+def _read_ndjson(stream):
+    for line in io.TextIOWrapper(stream, encoding='utf-8'):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # Surface the broken line as a row-level error instead of aborting the import.
+            yield None
+
+
+def validate_rows(user_id, rows):
+    """Validate raw rows in one pass.
+
+    Returns ``(valid, errors)`` where ``valid`` holds insert-ready parameter
+    dicts and ``errors`` holds ``{'row': n, 'error': message}`` entries with
+    1-based row numbers.
+    """
+    categories = category_cache.snapshot()
+    today = datetime.utcnow().date()
+    valid, errors = [], []
+    try:
+        for number, row in enumerate(rows, start=1):
+            if number > MAX_IMPORT_ROWS:
+                errors.append({'row': number, 'error': f'Import is limited to {MAX_IMPORT_ROWS} rows.'})
+                break
+            try:
+                valid.append(_validate_row(user_id, row, categories, today))
+            except ValueError as e:
+                errors.append({'row': number, 'error': str(e)})
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ImportFormatError(f'Could not read import body: {e}')
+    return valid, errors
+
+
+def _validate_row(user_id, row, categories, today):
+    if not isinstance(row, dict):
+        raise ValueError('Row is not a JSON object.')
+    for field in ('category_id', 'amount'):
+        if row.get(field) in (None, ''):
+            raise ValueError(f'Missing required field: {field}')
+
+    try:
+        category_id = int(row['category_id'])
+    except (TypeError, ValueError):
+        raise ValueError('category_id must be an integer.')
+    if not category_cache.exists(category_id, categories):
+        raise ValueError(f'Unknown category_id: {category_id}')
+
+    amount_cents = to_cents(row['amount'])
+    currency = normalize_currency(row.get('currency'))
+
+    date_str = row.get('date')
+    if date_str:
+        try:
+            date_obj = parse_date(str(date_str))
+        except ValueError:
+            raise ValueError('Invalid date format. Use YYYY-MM-DD.')
+    else:
+        date_obj = today
+
+    description = row.get('description') or ''
+    if not isinstance(description, str):
+        raise ValueError('description must be a string.')
+    if len(description) > 255:
+        raise ValueError('description must be at most 255 characters.')
+
+    return {
+        'user_id': user_id,
+        'category_id': category_id,
+        'amount_cents': amount_cents,
+        'currency': currency,
+        'date': date_obj,
+        'description': description,
+    }
+
+
+def insert_expenses(rows):
+    """Insert validated rows with executemany batches in the current transaction."""
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.session.execute(db.insert(Expense), rows[start:start + INSERT_BATCH_SIZE])
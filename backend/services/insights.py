@@ -0,0 +1,167 @@
+"""Spending insights computed with NumPy.
+
+A user's expenses for the last ``WINDOW_MONTHS`` months are read in one
+query as columns (id, amount_cents, date, category_id) and turned into
+arrays. Everything else is array arithmetic: daily and month x category
+totals come from ``bincount``/``add.at``, and outliers from per-category
+means, standard deviations and quartiles.
+
+Results are memoized per user and month together with the user's data
+version (see services.versions), so any budget or expense write makes the
+next request recompute them, in whichever worker serves it.
+"""
+import calendar
+from datetime import date, timedelta
+
+import numpy as np
+
+from extensions import db
+from models.models import Expense
+from services import versions
+from services.cache import TTLCache
+from services.categories import category_cache
+from services.dates import month_bounds, parse_month, shift_month
+
+WINDOW_MONTHS = 12
+ROLLING_DAYS = (7, 30, 90)
+PERCENTILES = (50, 75, 90, 95)
+# Expenses are outliers within their category when their z-score exceeds
+# OUTLIER_Z or they lie above Q3 + IQR_FACTOR * IQR.
+OUTLIER_Z = 3.0
+IQR_FACTOR = 1.5
+MIN_CATEGORY_SAMPLES = 5
+MAX_OUTLIERS = 20
+
+insights_cache = TTLCache(maxsize=512, ttl=600)
+
+
+def init_app(app):
+    insights_cache.maxsize = app.config.get('INSIGHTS_CACHE_SIZE', insights_cache.maxsize)
+    insights_cache.ttl = app.config.get('INSIGHTS_CACHE_TTL', insights_cache.ttl)
+
+
+def _money(cents):
+    return round(float(cents)) / 100
+
+
+def _load(user_id, start, end):
+    """Columns of the user's expenses dated in [start, end) as NumPy arrays."""
+    rows = db.session.execute(
+        db.select(Expense.id, Expense.amount_cents, Expense.date, Expense.category_id)
+        .where(Expense.user_id == user_id, Expense.date >= start, Expense.date < end)
+    ).all()
+    if not rows:
+        return (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, 'datetime64[D]'),
+                np.empty(0, np.int64))
+    ids, cents, dates, categories = zip(*rows)
+    return (np.array(ids, np.int64), np.array(cents, np.int64), np.array(dates, 'datetime64[D]'),
+            np.array(categories, np.int64))
+
+
+def _outliers(ids, cents, dates, cat_idx, cat_ids, in_month):
+    counts = np.bincount(cat_idx, minlength=len(cat_ids))
+    sums = np.bincount(cat_idx, weights=cents, minlength=len(cat_ids))
+    squares = np.bincount(cat_idx, weights=cents.astype(np.float64) ** 2, minlength=len(cat_ids))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sums / counts
+        std = np.sqrt(np.maximum(squares / counts - mean ** 2, 0))
+        z = (cents - mean[cat_idx]) / std[cat_idx]
+    z = np.nan_to_num(z, nan=0.0, posinf=0.0, neginf=0.0)
+
+    upper_fence = np.full(len(cat_ids), np.inf)
+    for i in np.flatnonzero(counts >= MIN_CATEGORY_SAMPLES):
+        q1, q3 = np.percentile(cents[cat_idx == i], (25, 75))
+        if q3 > q1:
+            upper_fence[i] = q3 + IQR_FACTOR * (q3 - q1)
+
+    enough = counts[cat_idx] >= MIN_CATEGORY_SAMPLES
+    by_z = z > OUTLIER_Z
+    by_iqr = cents > upper_fence[cat_idx]
+    flagged = np.flatnonzero(in_month & enough & (by_z | by_iqr))
+    flagged = flagged[np.argsort(-z[flagged], kind='stable')][:MAX_OUTLIERS]
+    return [
+        {
+            'expense_id': int(ids[i]),
+            'category_id': int(cat_ids[cat_idx[i]]),
+            'date': str(dates[i]),
+            'amount': _money(cents[i]),
+            'category_mean': _money(mean[cat_idx[i]]),
+            'z_score': round(float(z[i]), 2),
+            'methods': [name for name, hit in (('z_score', by_z[i]), ('iqr', by_iqr[i])) if hit],
+        }
+        for i in flagged
+    ]
+
+
+def compute(user_id, month, today):
+    """Insights for ``month`` (YYYY-MM) as seen on ``today``."""
+    first_month = shift_month(month, -(WINDOW_MONTHS - 1))
+    window_start = parse_month(first_month)
+    month_start, month_end = month_bounds(month)
+    ids, cents, dates, categories = _load(user_id, window_start, month_end)
+
+    # Days of the month that have happened; the whole month once it is over.
+    as_of = min(max(today, month_start - timedelta(days=1)), month_end - timedelta(days=1))
+    days_in_month = calendar.monthrange(month_start.year, month_start.month)[1]
+    days_elapsed = max((as_of - month_start).days + 1, 0)
+
+    day_idx = (dates - np.datetime64(window_start, 'D')).astype(np.int64)
+    daily = np.bincount(day_idx, weights=cents, minlength=(month_end - window_start).days)
+    end = (as_of - window_start).days + 1
+    rolling = {f'{days}d': _money(daily[max(end - days, 0):end].sum() / days) for days in ROLLING_DAYS}
+
+    month_idx = (dates.astype('datetime64[M]') - np.datetime64(first_month, 'M')).astype(np.int64)
+    cat_ids, cat_idx = np.unique(categories, return_inverse=True)
+    totals = np.zeros((WINDOW_MONTHS, len(cat_ids)), np.int64)
+    np.add.at(totals, (month_idx, cat_idx), cents)
+    current, previous = totals[-1], totals[-2]
+    names = category_cache.snapshot().by_id
+    changes = []
+    for i in np.flatnonzero((current != 0) | (previous != 0)):
+        delta = int(current[i] - previous[i])
+        changes.append({
+            'category_id': int(cat_ids[i]),
+            'category': names.get(int(cat_ids[i])),
+            'current': _money(current[i]),
+            'previous': _money(previous[i]),
+            'delta': _money(delta),
+            'delta_pct': round(delta * 100 / int(previous[i]), 1) if previous[i] else None,
+        })
+    changes.sort(key=lambda row: -abs(row['delta']))
+
+    in_month = month_idx == WINDOW_MONTHS - 1
+    spent_to_date = int(cents[in_month & (dates <= np.datetime64(as_of, 'D'))].sum())
+    if days_elapsed >= days_in_month:
+        projected = int(current.sum())
+    else:
+        projected = spent_to_date * days_in_month / days_elapsed if days_elapsed else 0
+
+    quantiles = np.percentile(cents, PERCENTILES) if len(cents) else np.zeros(len(PERCENTILES))
+    return {
+        'month': month,
+        'as_of': as_of.isoformat(),
+        'window': {'from': first_month, 'to': month},
+        'rolling_average': rolling,
+        'percentiles': {f'p{p}': _money(value) for p, value in zip(PERCENTILES, quantiles)},
+        'projection': {
+            'spent_to_date': _money(spent_to_date),
+            'projected_total': _money(projected),
+            'days_elapsed': days_elapsed,
+            'days_in_month': days_in_month,
+        },
+        'categories': changes,
+        'outliers': _outliers(ids, cents, dates, cat_idx, cat_ids, in_month),
+    }
+
+
+def insights(user_id, month, today=None):
+    """Memoized ``compute``; recomputed after any write by the user."""
+    today = today or date.today()
+    version = versions.current(user_id)
+    key = (user_id, month, today)
+    cached = insights_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    result = compute(user_id, month, today)
+    insights_cache.set(key, (version, result))
+    return result
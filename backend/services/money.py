@@ -0,0 +1,61 @@
+"""Conversion between API decimal amounts and stored integer minor units.
+
+Amounts are stored as integer cents so that sums are exact and independent of
+row order, in SQL and in Python alike. The API keeps exchanging plain decimal
+numbers; conversion happens only at the edges.
+"""
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+CENT = Decimal('0.01')
+DEFAULT_CURRENCY = 'KES'
+# Dashboard, rollup and report totals add amounts without converting between
+# currencies, so only the default currency is accepted until they do.
+SUPPORTED_CURRENCIES = frozenset({DEFAULT_CURRENCY})
+# Amounts up to 10 trillion; sums of many such amounts still fit in a BIGINT.
+MAX_CENTS = 10 ** 15 - 1
+
+
+def to_cents(value):
+    """Convert an API amount (number or numeric string) to integer cents.
+
+    Floats are converted through their shortest repr, so 0.1 becomes 10 cents
+    rather than the binary approximation. Raises ValueError for anything that
+    is not a finite number or whose magnitude exceeds MAX_CENTS.
+    """
+    if isinstance(value, bool):
+        raise ValueError('amount must be a number.')
+    try:
+        amount = Decimal(value if isinstance(value, int) else str(value).strip())
+    except (InvalidOperation, TypeError):
+        raise ValueError('amount must be a number.')
+    if not amount.is_finite():
+        raise ValueError('amount must be a number.')
+    if abs(amount.scaleb(2)) > MAX_CENTS:
+        raise ValueError('amount is too large.')
+    cents = int(amount.quantize(CENT, rounding=ROUND_HALF_UP).scaleb(2))
+    if abs(cents) > MAX_CENTS:
+        raise ValueError('amount is too large.')
+    return cents
+
+
+def from_cents(cents):
+    """Convert integer cents to the float the API returns.
+
+    True division of an integer by 100 is correctly rounded, so 30 cents comes
+    back as 0.3 exactly as a client would have sent it.
+    """
+    if cents is None:
+        return None
+    return int(cents) / 100
+
+
+def normalize_currency(value):
+    """Validate an ISO 4217 style currency code, defaulting to DEFAULT_CURRENCY."""
+    if value in (None, ''):
+        return DEFAULT_CURRENCY
+    if not isinstance(value, str) or len(value) != 3 or not value.isalpha():
+        raise ValueError('currency must be a three-letter code.')
+    currency = value.upper()
+    if currency not in SUPPORTED_CURRENCIES:
+        raise ValueError(f'Unsupported currency. Use {", ".join(sorted(SUPPORTED_CURRENCIES))}.')
+    return currency
@@ -0,0 +1,51 @@
+import base64
+import json
+
+from extensions import db
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort, order, value, row_id):
+    payload = json.dumps([sort, order, value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort, order):
+    """Return the (value, id) position stored in a cursor token.
+
+    A cursor is only valid for the sort and order it was issued with.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        cursor_sort, cursor_order, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor.')
+    if (cursor_sort, cursor_order) != (sort, order) or not isinstance(row_id, int):
+        raise InvalidCursor('Cursor does not match the requested sort order.')
+    return value, row_id
+
+
+def keyset_page(query, sort_column, id_column, order, limit, after=None):
+    """Apply keyset pagination to ``query`` ordered by ``(sort_column, id_column)``.
+
+    ``after`` is the (value, id) of the last row of the previous page. Seeking
+    past it with a row-value comparison keeps deep pages as cheap as the first
+    one, unlike ``OFFSET`` which has to walk every skipped row.
+    """
+    key = db.tuple_(sort_column, id_column)
+    if order == 'desc':
+        if after is not None:
+            query = query.where(key < db.tuple_(*after))
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        if after is not None:
+            query = query.where(key > db.tuple_(*after))
+        query = query.order_by(sort_column.asc(), id_column.asc())
+    # Fetch one extra row to know whether another page exists.
+    return query.limit(limit + 1)
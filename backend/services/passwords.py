@@ -0,0 +1,69 @@
+"""Password hashing with a configurable work factor and bounded concurrency.
+
+``PASSWORD_HASH_METHOD`` is any werkzeug method string, e.g. ``scrypt`` or
+``pbkdf2:sha256:600000``. Hashes stored with different parameters are
+upgraded on the next successful login (see ``needs_rehash``).
+
+Hashing is deliberately CPU-heavy. Every hash and verify runs on a small
+process-wide thread pool of ``PASSWORD_HASH_WORKERS`` threads, so a login
+storm can occupy at most that many cores and the cheap read endpoints served
+by the other threads keep running. Callers that cannot get a slot within
+``PASSWORD_HASH_TIMEOUT`` seconds get ``HasherBusy``.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(RuntimeError):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._methods = {}
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    workers = current_app.config['PASSWORD_HASH_WORKERS']
+                    # Allow a short queue behind the running hashes before shedding load.
+                    self._slots = threading.BoundedSemaphore(workers * 4)
+                    self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        return self._executor
+
+    def _run(self, fn, *args):
+        executor = self._pool()
+        if not self._slots.acquire(timeout=current_app.config['PASSWORD_HASH_TIMEOUT']):
+            raise HasherBusy('Too many concurrent password operations.')
+        try:
+            return executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def _method_prefix(self, method):
+        """The ``method:params`` prefix werkzeug writes for ``method``, e.g. scrypt -> scrypt:32768:8:1."""
+        prefix = self._methods.get(method)
+        if prefix is None:
+            prefix = generate_password_hash('', method).split('$', 1)[0]
+            self._methods[method] = prefix
+        return prefix
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+    def verify(self, stored_hash, password):
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        method = current_app.config['PASSWORD_HASH_METHOD']
+        return stored_hash.split('$', 1)[0] != self._method_prefix(method)
+
+
+hasher = PasswordHasher()
@@ -0,0 +1,197 @@
+"""Materialize recurring expenses and budget templates.
+
+``run()`` turns every occurrence due on or before a date into real Expense
+and Budget rows. It is safe to run from several workers at once and to rerun
+after a crash: each schedule is claimed with a conditional UPDATE on its
+``occurrences`` counter in the same transaction as the rows it produces, so
+an occurrence is written exactly once. Schedules are processed
+``BATCH_SIZE`` at a time and all occurrences of a batch, including catch-up
+for missed periods, go in with one batched insert. A schedule contributes at
+most ``max_catchup`` occurrences per batch; the rest follow in later batches.
+
+New schedules may not start so far back that more than ``max_catchup``
+occurrences are already due (``RECURRING_MAX_CATCHUP``), so the catch-up run
+inside a create request stays small. Older history belongs in a bulk import.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+
+from extensions import db
+from models.models import Budget, BudgetTemplate, RecurringExpense
+from services import imports, rollup, versions
+from services.dates import MONTH_FORMAT
+from services.schedules import InvalidRule, due, next_occurrence, parse_rule
+
+log = logging.getLogger('spentwise.recurring')
+
+BATCH_SIZE = 500
+
+max_catchup = 366
+
+
+def _today():
+    # Schedules run on UTC dates, like expense dates defaulted by the API.
+    return datetime.utcnow().date()
+
+
+def first_occurrence(rule_text, start_date, today=None):
+    """Parse ``rule_text`` and return (rule, next_date) for a new schedule.
+
+    Raises InvalidRule for a bad rule and ValueError when more than
+    ``max_catchup`` occurrences would already be due.
+    """
+    rule = parse_rule(rule_text)
+    if len(due(rule, start_date, 0, today or _today(), limit=max_catchup + 1)) > max_catchup:
+        raise ValueError(f'start is too far in the past: at most {max_catchup} past occurrences '
+                         f'can be created.')
+    return rule, next_occurrence(rule, start_date, 0)
+
+
+def _expense_row(schedule, when):
+    return {
+        'user_id': schedule.user_id,
+        'category_id': schedule.category_id,
+        'amount_cents': schedule.amount_cents,
+        'currency': schedule.currency,
+        'date': when,
+        'description': schedule.description,
+    }
+
+
+def _budget_row(template, when):
+    return {
+        'user_id': template.user_id,
+        'category_id': template.category_id,
+        'amount_cents': template.amount_cents,
+        'currency': template.currency,
+        'month': when.strftime(MONTH_FORMAT),
+    }
+
+
+def _insert_expenses(rows):
+    imports.insert_expenses(rows)
+    rollup.add_rows(rows)
+
+
+def _insert_budgets(rows):
+    db.session.execute(db.insert(Budget), rows)
+
+
+def _claim(model, schedule, through):
+    """Claim the due occurrences of ``schedule``; returns their dates, or [] if another worker won."""
+    try:
+        rule = parse_rule(schedule.rule)
+    except InvalidRule:
+        log.warning('Disabling %s %s with invalid rule %r', model.__tablename__, schedule.id, schedule.rule)
+        dates, done, next_date = [], schedule.occurrences, None
+    else:
+        dates = due(rule, schedule.start_date, schedule.occurrences, through, limit=max_catchup)
+        done = schedule.occurrences + len(dates)
+        next_date = next_occurrence(rule, schedule.start_date, done)
+    claimed = db.session.execute(
+        db.update(model)
+        .where(model.id == schedule.id, model.occurrences == schedule.occurrences)
+        .values(occurrences=done, next_date=next_date)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return dates if claimed else []
+
+
+def _materialize(model, through, *filters):
+    columns, build_row, insert_rows = _KINDS[model]
+    created = 0
+    while True:
+        query = (
+            db.select(model.id, model.user_id, model.rule, model.start_date, model.occurrences, *columns)
+            .where(model.next_date <= through, *filters)
+            .order_by(model.id)
+            .limit(BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        schedules = db.session.execute(query).all()
+        if not schedules:
+            return created
+
+        rows = []
+        users = set()
+        for schedule in schedules:
+            dates = _claim(model, schedule, through)
+            rows.extend(build_row(schedule, when) for when in dates)
+            if dates:
+                users.add(schedule.user_id)
+        if rows:
+            insert_rows(rows)
+        for owner in users:
+            versions.bump(owner)
+        db.session.commit()
+        created += len(rows)
+
+
+_KINDS = {
+    RecurringExpense: (
+        (RecurringExpense.category_id, RecurringExpense.amount_cents, RecurringExpense.currency,
+         RecurringExpense.description),
+        _expense_row, _insert_expenses,
+    ),
+    BudgetTemplate: (
+        (BudgetTemplate.category_id, BudgetTemplate.amount_cents, BudgetTemplate.currency),
+        _budget_row, _insert_budgets,
+    ),
+}
+
+
+def run(through=None, user_id=None):
+    """Materialize everything due on or before ``through`` (default today, UTC).
+
+    Returns ``(expenses_created, budgets_created)``.
+    """
+    through = through or _today()
+    counts = []
+    for model in (RecurringExpense, BudgetTemplate):
+        filters = () if user_id is None else (model.user_id == user_id,)
+        counts.append(_materialize(model, through, *filters))
+    return tuple(counts)
+
+
+def catch_up(schedule):
+    """Add the already-due occurrences of a new, uncommitted schedule to the session.
+
+    Nobody else can see the schedule before the caller commits, so its rows
+    are written without a claim and land in the same transaction as the
+    schedule itself. Other schedules are left to the scheduler or ``flask
+    recurring run``, so a create request only does work bounded by
+    ``max_catchup``. Returns the number of rows added.
+    """
+    _, build_row, insert_rows = _KINDS[type(schedule)]
+    rule = parse_rule(schedule.rule)
+    dates = due(rule, schedule.start_date, 0, _today(), limit=max_catchup)
+    schedule.occurrences = len(dates)
+    schedule.next_date = next_occurrence(rule, schedule.start_date, len(dates))
+    if dates:
+        insert_rows([build_row(schedule, when) for when in dates])
+    return len(dates)
+
+
+def _scheduler_loop(app, interval):
+    while True:
+        with app.app_context():
+            try:
+                expenses, budgets = run()
+                if expenses or budgets:
+                    log.info('Materialized %d recurring expenses and %d budgets', expenses, budgets)
+            except Exception:
+                db.session.rollback()
+                log.exception('Recurring materialization failed')
+        time.sleep(interval)
+
+
+def init_app(app):
+    """Apply ``RECURRING_MAX_CATCHUP`` and start the scheduler thread when ``RECURRING_INTERVAL`` is set."""
+    global max_catchup
+    max_catchup = app.config.get('RECURRING_MAX_CATCHUP', max_catchup)
+    interval = app.config.get('RECURRING_INTERVAL', 0)
+    if interval > 0 and not app.testing:
+        threading.Thread(target=_scheduler_loop, args=(app, interval), name='recurring-scheduler',
+                         daemon=True).start()
@@ -0,0 +1,143 @@
+"""Incremental maintenance of the monthly_spend rollup.
+
+Every expense write calls into this module inside the same transaction, so
+the rollup never disagrees with the committed expenses. ``rebuild`` and
+``verify`` recompute it from scratch for backfills and audits.
+"""
+from collections import defaultdict
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from extensions import db
+from models.models import Expense, MonthlySpend
+from services.dates import month_of
+from services.money import from_cents
+
+_UPSERT_DIALECTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+
+def expense_key(expense):
+    return expense.user_id, expense.date.strftime('%Y-%m'), expense.category_id
+
+
+def apply_deltas(deltas):
+    """Apply ``{(user_id, month, category_id): (total_cents, count)}`` deltas."""
+    deltas = {key: delta for key, delta in deltas.items() if delta != (0, 0)}
+    if not deltas:
+        return
+    rows = [
+        {'user_id': user_id, 'month': month, 'category_id': category_id, 'total_cents': total, 'count': count}
+        for (user_id, month, category_id), (total, count) in deltas.items()
+    ]
+    table = MonthlySpend.__table__
+    insert = _UPSERT_DIALECTS.get(db.session.get_bind().dialect.name)
+    if insert is not None:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.month, table.c.category_id],
+            set_={
+                'total_cents': table.c.total_cents + stmt.excluded.total_cents,
+                'count': table.c.count + stmt.excluded.count,
+            },
+        )
+        db.session.execute(stmt, rows)
+    else:
+        for row in rows:
+            updated = db.session.execute(
+                db.update(table)
+                .where(table.c.user_id == row['user_id'], table.c.month == row['month'],
+                       table.c.category_id == row['category_id'])
+                .values(total_cents=table.c.total_cents + row['total_cents'], count=table.c.count + row['count'])
+            )
+            if not updated.rowcount:
+                db.session.execute(db.insert(table), row)
+    shrunk = {row['user_id'] for row in rows if row['count'] < 0}
+    if shrunk:
+        # Drop buckets whose last expense was removed or moved away.
+        db.session.execute(db.delete(table).where(table.c.user_id.in_(shrunk), table.c.count <= 0))
+
+
+def add_expense(expense):
+    apply_deltas({expense_key(expense): (expense.amount_cents, 1)})
+
+
+def remove_expense(expense):
+    apply_deltas({expense_key(expense): (-expense.amount_cents, -1)})
+
+
+def move_expense(old_key, old_amount_cents, expense):
+    """Account for an update; moving across months or categories adjusts both buckets."""
+    deltas = defaultdict(lambda: (0, 0))
+    deltas[old_key] = (-old_amount_cents, -1)
+    total, count = deltas[expense_key(expense)]
+    deltas[expense_key(expense)] = (total + expense.amount_cents, count + 1)
+    apply_deltas(deltas)
+
+
+def add_rows(rows):
+    """Roll up plain expense parameter dicts, as used by bulk inserts."""
+    deltas = defaultdict(lambda: (0, 0))
+    for row in rows:
+        key = (row['user_id'], row['date'].strftime('%Y-%m'), row['category_id'])
+        total, count = deltas[key]
+        deltas[key] = (total + row['amount_cents'], count + 1)
+    apply_deltas(deltas)
+
+
+def _computed(user_id=None):
+    month = month_of(Expense.date)
+    query = (
+        db.select(Expense.user_id, month.label('month'), Expense.category_id,
+                  db.func.sum(Expense.amount_cents).label('total_cents'), db.func.count().label('count'))
+        .group_by(Expense.user_id, month, Expense.category_id)
+    )
+    if user_id is not None:
+        query = query.where(Expense.user_id == user_id)
+    return query
+
+
+def rebuild(user_id=None):
+    """Recompute the rollup from expenses with one INSERT ... SELECT. Returns the bucket count."""
+    delete = db.delete(MonthlySpend)
+    if user_id is not None:
+        delete = delete.where(MonthlySpend.user_id == user_id)
+    db.session.execute(delete)
+    query = _computed(user_id)
+    db.session.execute(
+        db.insert(MonthlySpend).from_select(['user_id', 'month', 'category_id', 'total_cents', 'count'], query)
+    )
+    count_query = db.select(db.func.count()).select_from(MonthlySpend)
+    if user_id is not None:
+        count_query = count_query.where(MonthlySpend.user_id == user_id)
+    return db.session.scalar(count_query)
+
+
+def verify(user_id=None):
+    """Return the buckets where the rollup disagrees with the expenses table."""
+    expected = {
+        (row.user_id, row.month, row.category_id): (int(row.total_cents), row.count)
+        for row in db.session.execute(_computed(user_id))
+    }
+    query = db.select(MonthlySpend.user_id, MonthlySpend.month, MonthlySpend.category_id,
+                      MonthlySpend.total_cents, MonthlySpend.count)
+    if user_id is not None:
+        query = query.where(MonthlySpend.user_id == user_id)
+    actual = {
+        (row.user_id, row.month, row.category_id): (row.total_cents, row.count)
+        for row in db.session.execute(query)
+    }
+
+    mismatches = []
+    for key in expected.keys() | actual.keys():
+        exp_total, exp_count = expected.get(key, (0, 0))
+        act_total, act_count = actual.get(key, (0, 0))
+        if (exp_total, exp_count) != (act_total, act_count):
+            mismatches.append({
+                'user_id': key[0], 'month': key[1], 'category_id': key[2],
+                'expected': {'total': from_cents(exp_total), 'count': exp_count},
+                'actual': {'total': from_cents(act_total), 'count': act_count},
+            })
+    return sorted(mismatches, key=lambda m: (m['user_id'], m['month'], m['category_id']))
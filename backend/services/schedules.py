@@ -0,0 +1,129 @@
+"""RRULE-style schedules for recurring expenses and budget templates.
+
+Supports the subset of RFC 5545 recurrence rules the app needs::
+
+    FREQ=DAILY|WEEKLY|MONTHLY|YEARLY  (required)
+    INTERVAL=n                        every n periods, default 1
+    BYMONTHDAY=d                      day of month for MONTHLY, -1 for the last day
+    COUNT=n                           stop after n occurrences
+    UNTIL=YYYYMMDD                    stop after this date
+
+Occurrences are numbered from the schedule's start date, so the n-th one can
+be computed directly and a schedule only needs to remember how many it has
+already produced. Days past the end of a month (the 31st, or 29 February)
+fall on that month's last day.
+"""
+import calendar
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+
+Rule = namedtuple('Rule', 'freq interval bymonthday count until')
+
+
+class InvalidRule(ValueError):
+    pass
+
+
+def _positive_int(name, value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise InvalidRule(f'{name} must be an integer.')
+    if number < 1:
+        raise InvalidRule(f'{name} must be at least 1.')
+    return number
+
+
+def parse_rule(text):
+    """Parse e.g. ``FREQ=MONTHLY;BYMONTHDAY=1`` into a Rule, raising InvalidRule."""
+    if not isinstance(text, str) or not text.strip():
+        raise InvalidRule('rule is required.')
+    text = text.strip()
+    if text.upper().startswith('RRULE:'):
+        text = text[len('RRULE:'):]
+    parts = {}
+    for part in text.split(';'):
+        name, sep, value = part.partition('=')
+        if not sep or not value:
+            raise InvalidRule(f'Invalid rule part: {part!r}')
+        parts[name.strip().upper()] = value.strip().upper()
+
+    freq = parts.pop('FREQ', None)
+    if freq not in FREQUENCIES:
+        raise InvalidRule(f'FREQ must be one of {", ".join(FREQUENCIES)}.')
+    interval = _positive_int('INTERVAL', parts.pop('INTERVAL', '1'))
+    count = parts.pop('COUNT', None)
+    count = _positive_int('COUNT', count) if count is not None else None
+
+    bymonthday = parts.pop('BYMONTHDAY', None)
+    if bymonthday is not None:
+        if freq != 'MONTHLY':
+            raise InvalidRule('BYMONTHDAY is only supported with FREQ=MONTHLY.')
+        try:
+            bymonthday = int(bymonthday)
+        except ValueError:
+            raise InvalidRule('BYMONTHDAY must be an integer.')
+        if bymonthday != -1 and not 1 <= bymonthday <= 31:
+            raise InvalidRule('BYMONTHDAY must be between 1 and 31, or -1.')
+
+    until = parts.pop('UNTIL', None)
+    if until is not None:
+        try:
+            until = datetime.strptime(until[:8], '%Y%m%d').date()
+        except ValueError:
+            raise InvalidRule('UNTIL must be a date in YYYYMMDD format.')
+
+    if parts:
+        raise InvalidRule(f'Unsupported rule parts: {", ".join(sorted(parts))}.')
+    return Rule(freq, interval, bymonthday, count, until)
+
+
+def _in_month(year, month, day):
+    last = calendar.monthrange(year, month)[1]
+    return date(year, month, last if day == -1 else min(day, last))
+
+
+def _add_months(start, months, day):
+    index = start.year * 12 + start.month - 1 + months
+    return _in_month(index // 12, index % 12 + 1, day)
+
+
+def occurrence(rule, start, n):
+    """Date of the ``n``-th occurrence (counting from 0), ignoring COUNT and UNTIL."""
+    if rule.freq == 'DAILY':
+        return start + timedelta(days=n * rule.interval)
+    if rule.freq == 'WEEKLY':
+        return start + timedelta(weeks=n * rule.interval)
+    if rule.freq == 'YEARLY':
+        return _in_month(start.year + n * rule.interval, start.month, start.day)
+    day = rule.bymonthday or start.day
+    # A month day earlier than the start date first falls in the next period.
+    if _add_months(start, 0, day) < start:
+        n += 1
+    return _add_months(start, n * rule.interval, day)
+
+
+def next_occurrence(rule, start, n):
+    """Date of the ``n``-th occurrence, or None once COUNT or UNTIL has been reached."""
+    if rule.count is not None and n >= rule.count:
+        return None
+    when = occurrence(rule, start, n)
+    if rule.until is not None and when > rule.until:
+        return None
+    return when
+
+
+def due(rule, start, done, through, limit=None):
+    """Dates of the occurrences after the first ``done`` that fall on or before ``through``.
+
+    At most ``limit`` dates are returned when it is given.
+    """
+    dates = []
+    when = next_occurrence(rule, start, done)
+    while when is not None and when <= through and (limit is None or len(dates) < limit):
+        dates.append(when)
+        done += 1
+        when = next_occurrence(rule, start, done)
+    return dates
@@ -0,0 +1,118 @@
+"""Full-text search over expense descriptions.
+
+SQLite keeps an FTS5 table, ``expenses_fts``, in step with ``expenses``
+through triggers. Each entry carries an ``owner`` token (``u<user_id>``) next
+to the description, so the index itself narrows matches to one user instead
+of intersecting every user's hits with a user_id filter. PostgreSQL uses a
+GIN index on ``to_tsvector('simple', description)``.
+
+Every word of the query is matched as a prefix ("caf" finds "Cafe") and
+results are ranked by BM25 on SQLite and ts_rank on PostgreSQL.
+"""
+import re
+
+from sqlalchemy import DDL, event
+
+from extensions import db
+from models.models import Expense
+
+MAX_TERMS = 8
+TS_CONFIG = "'simple'::regconfig"
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5(owner, description, prefix='2 3')",
+    """CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses BEGIN
+    INSERT INTO expenses_fts (rowid, owner, description)
+    VALUES (new.id, 'u' || new.user_id, coalesce(new.description, ''));
+END""",
+    """CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses BEGIN
+    DELETE FROM expenses_fts WHERE rowid = old.id;
+END""",
+    """CREATE TRIGGER IF NOT EXISTS expenses_fts_update AFTER UPDATE OF user_id, description ON expenses BEGIN
+    UPDATE expenses_fts SET owner = 'u' || new.user_id, description = coalesce(new.description, '')
+    WHERE rowid = new.id;
+END""",
+)
+SQLITE_BACKFILL = (
+    "INSERT INTO expenses_fts (rowid, owner, description) "
+    "SELECT id, 'u' || user_id, coalesce(description, '') FROM expenses"
+)
+POSTGRES_DDL = (
+    f"CREATE INDEX IF NOT EXISTS ix_expenses_description_fts ON expenses "
+    f"USING gin (to_tsvector({TS_CONFIG}, coalesce(description, '')))",
+)
+
+for statement in SQLITE_DDL:
+    event.listen(Expense.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_DDL:
+    event.listen(Expense.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+event.listen(Expense.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS expenses_fts').execute_if(dialect='sqlite'))
+
+
+def terms(q):
+    """Split a search string into at most MAX_TERMS lowercase words."""
+    return re.findall(r'\w+', (q or '').lower())[:MAX_TERMS]
+
+
+def _sqlite_search(query, user_id, words):
+    fts = db.table('expenses_fts', db.column('rowid'))
+    rank = db.func.bm25(db.literal_column('expenses_fts'), 0.0, 1.0)
+    # The owner token restricts matches to the user inside the index.
+    match = f'owner:"u{int(user_id)}" AND description:(' + ' '.join(f'"{word}"*' for word in words) + ')'
+    return (
+        query.join(fts, fts.c.rowid == Expense.id)
+        .where(db.literal_column('expenses_fts').op('MATCH')(match))
+        .order_by(rank, Expense.date.desc(), Expense.id.desc())
+    )
+
+
+def _postgres_search(query, user_id, words):
+    vector = db.func.to_tsvector(db.literal_column(TS_CONFIG), db.func.coalesce(Expense.description, ''))
+    tsquery = db.func.to_tsquery(db.literal_column(TS_CONFIG), ' & '.join(f'{word}:*' for word in words))
+    return (
+        query.where(Expense.user_id == user_id, vector.op('@@')(tsquery))
+        .order_by(db.func.ts_rank(vector, tsquery).desc(), Expense.date.desc(), Expense.id.desc())
+    )
+
+
+def _fallback_search(query, user_id, words):
+    for word in words:
+        query = query.where(Expense.description.ilike(f'%{word}%'))
+    return query.where(Expense.user_id == user_id).order_by(Expense.date.desc(), Expense.id.desc())
+
+
+_DIALECTS = {
+    'sqlite': _sqlite_search,
+    'postgresql': _postgres_search,
+}
+
+
+def search_expenses(query, user_id, words, limit):
+    """Restrict ``query`` (a select over expenses, not yet filtered by user) to
+    ``user_id``'s rows matching ``words``, best match first."""
+    search = _DIALECTS.get(db.session.get_bind().dialect.name, _fallback_search)
+    return search(query, user_id, words).limit(limit)
+
+
+def install():
+    """Create the search index on an existing database, filling it if it is new. Idempotent."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        exists = db.session.execute(db.text("SELECT 1 FROM sqlite_master WHERE name = 'expenses_fts'")).first()
+        for statement in SQLITE_DDL:
+            db.session.execute(db.text(statement))
+        if not exists:
+            db.session.execute(db.text(SQLITE_BACKFILL))
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_DDL:
+            db.session.execute(db.text(statement))
+
+
+def rebuild():
+    """Re-index every expense from scratch."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        db.session.execute(db.text('DELETE FROM expenses_fts'))
+        db.session.execute(db.text(SQLITE_BACKFILL))
+    elif dialect == 'postgresql':
+        db.session.execute(db.text('REINDEX INDEX ix_expenses_description_fts'))
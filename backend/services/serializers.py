@@ -0,0 +1,117 @@
+"""Row serializers and the JSON provider used for API responses.
+
+List endpoints select ``EXPENSE_COLUMNS``/``BUDGET_COLUMNS`` instead of whole
+entities, so rows come back as plain tuples without ORM identity-map or
+attribute instrumentation overhead. ``expense_dict``/``budget_dict`` accept
+either such a row or a model instance.
+"""
+import re
+
+from flask.json.provider import DefaultJSONProvider
+
+from models.models import Budget, Expense
+from services.money import from_cents
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+EXPENSE_COLUMNS = (
+    Expense.id, Expense.user_id, Expense.category_id, Expense.amount_cents, Expense.currency,
+    Expense.date, Expense.description,
+)
+BUDGET_COLUMNS = (
+    Budget.id, Budget.user_id, Budget.category_id, Budget.amount_cents, Budget.currency, Budget.month,
+)
+
+
+def expense_dict(row):
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'category_id': row.category_id,
+        'amount': from_cents(row.amount_cents),
+        'currency': row.currency,
+        'date': row.date.isoformat(),
+        'description': row.description
+    }
+
+
+def budget_dict(row):
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'category_id': row.category_id,
+        'amount': from_cents(row.amount_cents),
+        'currency': row.currency,
+        'month': row.month
+    }
+
+
+def recurring_expense_dict(schedule):
+    return {
+        'id': schedule.id,
+        'user_id': schedule.user_id,
+        'category_id': schedule.category_id,
+        'amount': from_cents(schedule.amount_cents),
+        'currency': schedule.currency,
+        'description': schedule.description,
+        'rule': schedule.rule,
+        'start_date': schedule.start_date.isoformat(),
+        'next_date': schedule.next_date.isoformat() if schedule.next_date else None
+    }
+
+
+def budget_template_dict(template):
+    return {
+        'id': template.id,
+        'user_id': template.user_id,
+        'category_id': template.category_id,
+        'amount': from_cents(template.amount_cents),
+        'currency': template.currency,
+        'rule': template.rule,
+        'start_month': template.start_date.strftime('%Y-%m'),
+        'next_month': template.next_date.strftime('%Y-%m') if template.next_date else None
+    }
+
+
+# orjson writes exponent floats (1e16 vs 1e+16), small floats (0.00001 vs
+# 1e-05) and DEL differently from the stdlib encoder. These checks are cheap
+# byte scans; a false positive only costs a fallback.
+_EXPONENT = re.compile(rb'e[-0-9]')
+
+
+def _matches_stdlib(data):
+    return data.isascii() and b'.0000' not in data and b'\x7f' not in data and not _EXPONENT.search(data)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Encode compact responses with orjson, byte-for-byte like the default provider.
+
+    Anything orjson would render differently (non-ASCII text, which the
+    default provider escapes; integers beyond 64 bits; non-string keys; the
+    float forms above) is re-encoded with the stdlib. Pretty-printed output
+    always uses the stdlib. NaN and infinity come out as ``null`` rather than
+    the stdlib's invalid ``NaN`` tokens.
+    """
+
+    options = orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS \
+        if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if kwargs and kwargs != {'separators': (',', ':')}:
+            return super().dumps(obj, **kwargs)
+        try:
+            data = orjson.dumps(obj, default=self.default, option=self.options)
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+        if not _matches_stdlib(data):
+            return super().dumps(obj, **kwargs)
+        return data.decode()
+
+
+def init_app(app):
+    """Install the JSON provider named by ``JSON_PROVIDER``."""
+    if app.config.get('JSON_PROVIDER') == 'orjson' and orjson is not None:
+        app.json = ORJSONProvider(app)
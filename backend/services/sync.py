@@ -0,0 +1,128 @@
+"""Change feed for offline clients.
+
+Expenses and budgets carry the owner's data version at their last write in
+``seq`` (see services.versions), and deletions leave a SyncTombstone with the
+same stamp. A client keeps the ``seq`` of its last sync and asks for
+everything stamped after it; an account with no writes since costs one
+primary-key lookup on ``users``.
+
+Changes are read up to the version seen at the start of the sync. That
+version is only visible once its transaction has committed, and writers for a
+user are serialized on the user's row, so every row stamped at or below it is
+already visible and a response never skips a change.
+
+Large syncs are split into pages of at most ``limit`` items. Deletions come
+first, then expenses, then budgets, each in (seq, id) order; the cursor pins
+the version range, so later writes wait for the next sync. Clients apply
+deletions before upserts (SQLite can reuse the id of a deleted row).
+"""
+import base64
+import json
+
+from extensions import db
+from models.models import Budget, Expense, SyncTombstone
+from services import serializers, versions
+from services.pagination import InvalidCursor, keyset_page
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 5000
+
+KINDS = {
+    Expense: 'expense',
+    Budget: 'budget',
+}
+
+
+def record_deletion(row):
+    """Leave a tombstone for an expense or budget deleted in the current transaction."""
+    db.session.add(SyncTombstone(user_id=row.user_id, kind=KINDS[type(row)], row_id=row.id))
+
+
+def _expense_item(row):
+    return {**serializers.expense_dict(row), 'updated_at': row.updated_at.isoformat() if row.updated_at else None}
+
+
+def _budget_item(row):
+    return {**serializers.budget_dict(row), 'updated_at': row.updated_at.isoformat() if row.updated_at else None}
+
+
+# (model, selected columns, serializer) per section, in the order pages walk them.
+SECTIONS = (
+    (SyncTombstone, (SyncTombstone.kind, SyncTombstone.row_id), None),
+    (Expense, serializers.EXPENSE_COLUMNS + (Expense.updated_at,), _expense_item),
+    (Budget, serializers.BUDGET_COLUMNS + (Budget.updated_at,), _budget_item),
+)
+
+
+def encode_cursor(version, since, section, seq, row_id):
+    payload = json.dumps([version, since, section, seq, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return the (version, since, section, after) stored in a cursor token."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        version, since, section, seq, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor.')
+    if not all(isinstance(v, int) for v in (version, since, section)) or not 0 <= section < len(SECTIONS):
+        raise InvalidCursor('Invalid cursor.')
+    return version, since, section, (seq, row_id) if row_id is not None else None
+
+
+def changes(user_id, since, limit=DEFAULT_LIMIT, cursor=None):
+    """One page of the expenses and budgets written, and ids deleted, after ``since``.
+
+    Pass the returned ``cursor`` back while ``has_more`` is set. A ``since``
+    ahead of the user's version (e.g. a copy of another account's data) is
+    answered as a full sync with ``reset`` set, telling the client to replace
+    its copy.
+    """
+    reset = False
+    if cursor is None:
+        version = versions.current(user_id)
+        reset = since > version
+        if reset:
+            since = 0
+        section, after = 0, None
+    else:
+        version, since, section, after = decode_cursor(cursor)
+    result = {
+        'seq': version,
+        'reset': reset,
+        'has_more': False,
+        'cursor': None,
+        'expenses': [],
+        'budgets': [],
+        'deleted': {'expenses': [], 'budgets': []},
+    }
+    if since >= version:
+        return result
+    if since == 0 and section == 0:
+        # A full download has nothing to delete.
+        section = 1
+
+    remaining = limit
+    while section < len(SECTIONS) and remaining > 0:
+        model, columns, serialize = SECTIONS[section]
+        query = db.select(*columns, model.seq, model.id).where(
+            model.user_id == user_id, model.seq > since, model.seq <= version
+        )
+        rows = db.session.execute(keyset_page(query, model.seq, model.id, 'asc', remaining, after)).all()
+        page = rows[:remaining]
+        for row in page:
+            if serialize is None:
+                result['deleted'][f'{row.kind}s'].append(row.row_id)
+            else:
+                result[model.__tablename__].append(serialize(row))
+        if len(rows) > remaining:
+            after = (page[-1].seq, page[-1].id)
+            break
+        remaining -= len(page)
+        section, after = section + 1, None
+
+    if section < len(SECTIONS):
+        result['has_more'] = True
+        result['cursor'] = encode_cursor(version, since, section, *(after or (None, None)))
+    return result
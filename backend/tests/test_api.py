@@ -1,9 +1,707 @@
 import pytest
-from app import app
+from app import create_app
+from config import TestingConfig
+from extensions import db
+from models.models import Budget, Category
+from services import identity, insights
+from services.categories import seed_categories
 import json
 
+app = create_app(TestingConfig)
+with app.app_context():
+    db.create_all()
+    seed_categories()
+
 @pytest.fixture
 def client():
-    app.config['TESTING'] = True
     with app.test_client() as client:
         yield client
+    with app.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            if table.name != 'categories':
+                db.session.execute(table.delete())
+        db.session.commit()
+    identity.user_cache.clear()
+    insights.insights_cache.clear()
+
+@pytest.fixture
+def auth_headers(client):
+    response = client.post('/api/register', json={
+        'username': 'sheilah', 'email': 'sheilah@example.com', 'password': 'password123'
+    })
+    token = response.get_json()['token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_dashboard_totals(client, auth_headers):
+    client.post('/api/budgets', json={'amount': 1000, 'month': '2026-05'}, headers=auth_headers)
+    client.post('/api/expenses', json={'category_id': 1, 'amount': 200, 'date': '2026-05-02'}, headers=auth_headers)
+    client.post('/api/expenses', json={'category_id': 3, 'amount': 50.5, 'date': '2026-05-03'}, headers=auth_headers)
+    client.post('/api/expenses', json={'category_id': 3, 'amount': 10, 'date': '2026-06-01'}, headers=auth_headers)
+
+    data = client.get('/api/dashboard?month=2026-05', headers=auth_headers).get_json()
+    assert data == {'month': '2026-05', 'total_budget': 1000, 'total_spent': 250.5, 'remaining': 749.5}
+
+    data = client.get('/api/dashboard?month=2026-5', headers=auth_headers).get_json()
+    assert data == {'month': '2026-05', 'total_budget': 1000, 'total_spent': 250.5, 'remaining': 749.5}
+
+    data = client.get('/api/dashboard', headers=auth_headers).get_json()
+    assert data['month'] == 'all'
+    assert data['total_spent'] == 260.5
+
+
+def test_dashboard_breakdown(client, auth_headers):
+    client.post('/api/expenses', json={'category_id': 1, 'amount': 200, 'date': '2026-05-02'}, headers=auth_headers)
+    client.post('/api/expenses', json={'category_id': 3, 'amount': 50, 'date': '2026-05-02'}, headers=auth_headers)
+    client.post('/api/expenses', json={'category_id': 3, 'amount': 25, 'date': '2026-05-09'}, headers=auth_headers)
+
+    data = client.get('/api/dashboard?month=2026-05&breakdown=category', headers=auth_headers).get_json()
+    assert [(row['category_id'], row['total']) for row in data['breakdown']] == [(1, 200), (3, 75)]
+
+    data = client.get('/api/dashboard?month=2026-05&breakdown=day', headers=auth_headers).get_json()
+    assert data['breakdown'] == [{'date': '2026-05-02', 'total': 250}, {'date': '2026-05-09', 'total': 25}]
+
+    response = client.get('/api/dashboard?breakdown=week', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_month_filter_uses_date_range(client, auth_headers):
+    client.post('/api/expenses', json={'category_id': 1, 'amount': 5, 'date': '2025-12-31'}, headers=auth_headers)
+    client.post('/api/expenses', json={'category_id': 1, 'amount': 7, 'date': '2026-01-01'}, headers=auth_headers)
+
+    data = client.get('/api/expenses?month=2025-12', headers=auth_headers).get_json()
+    assert [e['date'] for e in data] == ['2025-12-31']
+
+    response = client.get('/api/expenses?month=2025-13', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_expenses_keyset_pagination(client, auth_headers):
+    for day in range(1, 8):
+        client.post('/api/expenses', json={'category_id': 1 + day % 2, 'amount': day * 10, 'date': f'2026-05-0{day}'},
+                    headers=auth_headers)
+
+    seen, cursor = [], None
+    while True:
+        url = '/api/expenses?limit=3' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(url, headers=auth_headers).get_json()
+        seen.extend(e['date'] for e in page['expenses'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert seen == [f'2026-05-0{day}' for day in range(7, 0, -1)]
+
+    page = client.get('/api/expenses?limit=10&sort=amount&order=asc&category_id=2&min_amount=20&to=2026-05-05',
+                      headers=auth_headers).get_json()
+    assert [e['amount'] for e in page['expenses']] == [30, 50]
+
+    first = client.get('/api/expenses?limit=2', headers=auth_headers).get_json()
+    response = client.get('/api/expenses?limit=2&sort=amount&cursor=' + first['next_cursor'], headers=auth_headers)
+    assert response.status_code == 400
+    assert client.get('/api/expenses?cursor=bogus', headers=auth_headers).status_code == 400
+
+
+def test_bulk_import_formats(client, auth_headers):
+    response = client.post('/api/expenses/bulk', headers=auth_headers, json=[
+        {'category_id': 1, 'amount': 12.5, 'date': '2026-05-01', 'description': 'Lunch'},
+        {'category_id': 1, 'amount': 'abc'},
+        {'category_id': 999, 'amount': 3},
+        {'category_id': 2, 'amount': 8, 'date': '05/02/2026'},
+    ])
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data['created'] == 2
+    assert [e['row'] for e in data['errors']] == [2, 3]
+
+    csv_body = 'category_id,amount,date,description\n3,20,2026-05-03,Taxi\n3,,2026-05-04,Bus\n'
+    response = client.post('/api/expenses/bulk', headers=auth_headers, data=csv_body, content_type='text/csv')
+    assert response.get_json() == {'created': 1, 'errors': [{'row': 2, 'error': 'Missing required field: amount'}]}
+
+    ndjson_body = '{"category_id": 4, "amount": 1}\nnot json\n'
+    response = client.post('/api/expenses/bulk', headers=auth_headers, data=ndjson_body,
+                           content_type='application/x-ndjson')
+    assert response.get_json()['created'] == 1
+
+    dates = sorted(e['date'] for e in client.get('/api/expenses?month=2026-05', headers=auth_headers).get_json())
+    assert dates == ['2026-05-01', '2026-05-02', '2026-05-03']
+
+
+def test_export_streams_csv_and_ndjson(client, auth_headers):
+    client.post('/api/expenses', json={'category_id': 1, 'amount': 12.5, 'date': '2026-05-01', 'description': 'Lunch, work'},
+                headers=auth_headers)
+    client.post('/api/budgets', json={'amount': 1000, 'month': '2026-05'}, headers=auth_headers)
+
+    response = client.get('/api/expenses/export?format=csv', headers=auth_headers)
+    assert response.is_streamed
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0] == 'id,user_id,category_id,amount,currency,date,description'
+    assert lines[1].endswith(',1,12.5,KES,2026-05-01,"Lunch, work"')
+
+    response = client.get('/api/budgets/export?format=ndjson', headers=auth_headers)
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(row['amount'], row['month']) for row in rows] == [(1000, '2026-05')]
+
+    assert client.get('/api/expenses/export?format=xml', headers=auth_headers).status_code == 400
+
+
+def test_categories_etag_and_invalidation(client, auth_headers):
+    response = client.get('/api/categories', headers=auth_headers)
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+
+    response = client.get('/api/categories', headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 304
+
+    created = client.post('/api/categories', json={'name': 'Pets'}, headers=auth_headers).get_json()
+    response = client.get('/api/categories', headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert {'id': created['id'], 'name': 'Pets'} in response.get_json()
+    assert client.get(f"/api/categories/{created['id']}", headers=auth_headers).get_json()['name'] == 'Pets'
+
+    client.delete(f"/api/categories/{created['id']}", headers=auth_headers)
+    assert client.get(f"/api/categories/{created['id']}", headers=auth_headers).status_code == 404
+
+
+def test_category_cache_miss_checks_database(client, auth_headers):
+    client.get('/api/categories', headers=auth_headers)
+    with app.app_context():
+        # Written by another worker: this worker's cache is not invalidated.
+        category = Category(name='Pets')
+        db.session.add(category)
+        db.session.commit()
+        category_id = category.id
+
+    response = client.post('/api/budgets', json={'amount': 50, 'month': '2026-05', 'category_id': category_id},
+                           headers=auth_headers)
+    assert response.status_code == 201
+    response = client.post('/api/budgets', json={'amount': 50, 'month': '2026-05', 'category_id': 2 ** 40},
+                           headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_monthly_rollup_tracks_expense_writes(client, auth_headers):
+    from services import rollup
+
+    first = client.post('/api/expenses', json={'category_id': 1, 'amount': 30, 'date': '2026-05-10'},
+                        headers=auth_headers).get_json()
+    client.post('/api/expenses', json={'category_id': 1, 'amount': 20, 'date': '2026-05-11'}, headers=auth_headers)
+    client.post('/api/expenses/bulk', json=[{'category_id': 2, 'amount': 5, 'date': '2026-06-01'}], headers=auth_headers)
+    client.put(f"/api/expenses/{first['id']}", json={'category_id': 2, 'date': '2026-06-02'}, headers=auth_headers)
+    response = client.put(f"/api/expenses/{first['id']}", json={'date': '2026-06-31'}, headers=auth_headers)
+    assert response.status_code == 400
+
+    assert client.get('/api/dashboard?month=2026-05', headers=auth_headers).get_json()['total_spent'] == 20
+    breakdown = client.get('/api/dashboard?month=2026-06&breakdown=category', headers=auth_headers).get_json()
+    assert [(row['category_id'], row['total']) for row in breakdown['breakdown']] == [(2, 35)]
+
+    client.delete(f"/api/expenses/{first['id']}", headers=auth_headers)
+    with app.app_context():
+        assert rollup.verify() == []
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['rollup', 'rebuild'])
+    assert 'Rebuilt 2 monthly_spend buckets.' in result.output
+    assert runner.invoke(args=['rollup', 'verify']).exit_code == 0
+
+
+def test_amounts_are_stored_as_exact_cents(client, auth_headers):
+    for amount in (0.1, 0.2, '0.7'):
+        client.post('/api/expenses', json={'category_id': 1, 'amount': amount, 'date': '2026-05-01'}, headers=auth_headers)
+    client.post('/api/budgets', json={'amount': 1, 'month': '2026-05'}, headers=auth_headers)
+
+    data = client.get('/api/dashboard?month=2026-05', headers=auth_headers).get_json()
+    assert (data['total_spent'], data['remaining']) == (1.0, 0.0)
+    assert [e['amount'] for e in client.get('/api/expenses', headers=auth_headers).get_json()] == [0.1, 0.2, 0.7]
+
+    for amount in ('NaN', '1e400', 10 ** 20):
+        response = client.post('/api/expenses', json={'category_id': 1, 'amount': amount}, headers=auth_headers)
+        assert response.status_code == 400
+        response = client.post('/api/budgets', json={'amount': amount, 'month': '2026-06'}, headers=auth_headers)
+        assert response.status_code == 400
+    response = client.post('/api/batch', json={'operations': [
+        {'op': 'create', 'type': 'expense', 'data': {'category_id': 1, 'amount': '1e400'}},
+    ]}, headers=auth_headers)
+    assert response.status_code == 400
+    # Totals do not convert between currencies, so other currencies are refused.
+    response = client.post('/api/expenses', json={'category_id': 1, 'amount': 5, 'currency': 'USD'},
+                           headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_trend_report_is_columnar(client, auth_headers):
+    client.post('/api/budgets', json={'amount': 500, 'month': '2026-03'}, headers=auth_headers)
+    client.post('/api/expenses', json={'category_id': 1, 'amount': 40, 'date': '2026-01-15'}, headers=auth_headers)
+    client.post('/api/expenses', json={'category_id': 2, 'amount': 10, 'date': '2026-03-01'}, headers=auth_headers)
+    client.post('/api/expenses', json={'category_id': 1, 'amount': 5, 'date': '2026-03-20'}, headers=auth_headers)
+
+    data = client.get('/api/reports/trend?from=2026-01&to=2026-03', headers=auth_headers).get_json()
+    assert data['months'] == ['2026-01', '2026-02', '2026-03']
+    assert data['budget'] == [0, 0, 500]
+    assert data['spent'] == [40, 0, 15]
+    assert 'categories' not in data
+
+    data = client.get('/api/reports/trend?from=2026-01&to=2026-03&group=category', headers=auth_headers).get_json()
+    assert data['categories'] == {
+        'month': ['2026-01', '2026-03', '2026-03'], 'category_id': [1, 1, 2], 'spent': [40, 5, 10]
+    }
+
+    assert client.get('/api/reports/trend?from=2026-04&to=2026-03', headers=auth_headers).status_code == 400
+
+    assert client.post('/api/budgets', json={'amount': 1, 'month': '2026-02x'}, headers=auth_headers).status_code == 400
+    budget = client.post('/api/budgets', json={'amount': 70, 'month': '2026-2'}, headers=auth_headers).get_json()
+    assert budget['month'] == '2026-02'
+    response = client.put(f"/api/budgets/{budget['id']}", json={'month': '2026-13'}, headers=auth_headers)
+    assert response.status_code == 400
+    with app.app_context():
+        # A malformed month stored before validation is skipped, not a 500.
+        db.session.execute(db.update(Budget).values(month='2026-02x').where(Budget.id == budget['id']))
+        db.session.commit()
+    data = client.get('/api/reports/trend?from=2026-01&to=2026-03', headers=auth_headers).get_json()
+    assert data['budget'] == [0, 0, 500]
+
+
+def test_request_instrumentation(client, auth_headers, caplog):
+    response = client.get('/api/dashboard?month=2026-05', headers=auth_headers)
+    assert 'db;dur=' in response.headers['Server-Timing']
+    assert '"1 queries"' in response.headers['Server-Timing']
+
+    app.config['SLOW_QUERY_THRESHOLD_MS'] = 0
+    try:
+        with caplog.at_level('WARNING', logger='spentwise.slow_query'):
+            client.get('/api/dashboard', headers=auth_headers)
+    finally:
+        app.config['SLOW_QUERY_THRESHOLD_MS'] = 200
+    assert 'GET /api/dashboard (routes.dashboard)' in caplog.text
+
+    with app.app_context():
+        with pytest.raises(Exception):
+            db.session.execute(db.text('SELECT * FROM missing_table'))
+        db.session.rollback()
+        assert db.session.connection().info.get('query_start') == []
+
+    assert client.get('/api/_metrics').status_code == 401
+    metrics = client.get('/api/_metrics', headers={'Authorization': 'Bearer test-metrics-token'})
+    metrics = metrics.get_data(as_text=True)
+    assert '# TYPE spentwise_request_duration_seconds histogram' in metrics
+    assert 'spentwise_request_duration_seconds_bucket{endpoint="routes.dashboard",method="GET",status="200",le="+Inf"}' in metrics
+    assert 'spentwise_db_queries_total{endpoint="routes.dashboard",method="GET",status="200"}' in metrics
+
+
+def test_login_rehashes_outdated_password_hashes(client, auth_headers):
+    from models.models import User
+    with app.app_context():
+        assert db.session.scalar(db.select(User.password)).startswith('pbkdf2:sha256:1000$')
+
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    try:
+        response = client.post('/api/login', json={'email': 'sheilah@example.com', 'password': 'password123'})
+        assert response.status_code == 200
+        with app.app_context():
+            assert db.session.scalar(db.select(User.password)).startswith('pbkdf2:sha256:2000$')
+        response = client.post('/api/login', json={'email': 'sheilah@example.com', 'password': 'password123'})
+        assert response.status_code == 200
+        response = client.post('/api/login', json={'email': 'sheilah@example.com', 'password': 'wrong'})
+        assert response.status_code == 401
+    finally:
+        app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+
+
+def test_current_user_served_from_token_cache(client, auth_headers):
+    from flask_jwt_extended import decode_token
+    with app.app_context():
+        claims = decode_token(auth_headers['Authorization'].split()[1])
+    assert (claims['username'], claims['email']) == ('sheilah', 'sheilah@example.com')
+
+    response = client.get('/api/users/me', headers=auth_headers)
+    assert '"0 queries"' in response.headers['Server-Timing']
+    assert response.get_json()['username'] == 'sheilah'
+
+    client.put('/api/users/me', json={'username': 'shyllah'}, headers=auth_headers)
+    assert client.get('/api/users/me', headers=auth_headers).get_json()['username'] == 'shyllah'
+
+    client.delete('/api/users/me', headers=auth_headers)
+    assert client.get('/api/dashboard', headers=auth_headers).status_code == 401
+
+
+def test_logout_revokes_token(client, auth_headers):
+    from services.blocklist import LocalBlocklist, blocklist
+    assert client.post('/api/logout', headers=auth_headers).status_code == 200
+    response = client.get('/api/users/me', headers=auth_headers)
+    assert response.status_code == 401
+    assert '"0 queries"' in response.headers['Server-Timing']
+
+    login = client.post('/api/login', json={'email': 'sheilah@example.com', 'password': 'password123'})
+    headers = {'Authorization': f"Bearer {login.get_json()['token']}"}
+    assert client.get('/api/users/me', headers=headers).status_code == 200
+
+    revoked = LocalBlocklist(maxsize=2)
+    assert revoked.add('expired', 0)
+    assert revoked.add('a', 2e9) and revoked.add('b', 2e9 + 1)
+    # Full of live revocations: the new one is refused, the old ones stay revoked.
+    assert not revoked.add('c', 2e9 + 2)
+    assert revoked.contains('a') and revoked.contains('b') and not revoked.contains('c')
+    assert not revoked.contains('expired') and len(revoked) == 2
+
+    full = LocalBlocklist(maxsize=0)
+    blocklist.local, original = full, blocklist.local
+    try:
+        login = client.post('/api/login', json={'email': 'sheilah@example.com', 'password': 'password123'})
+        headers = {'Authorization': f"Bearer {login.get_json()['token']}"}
+        assert client.post('/api/logout', headers=headers).status_code == 503
+    finally:
+        blocklist.local = original
+    assert client.get('/api/users/me', headers=auth_headers).status_code == 401
+
+
+def test_sqlite_engine_profile(tmp_path):
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+
+    file_app = create_app(FileConfig)
+    with file_app.app_context():
+        db.create_all()
+        with db.engine.connect() as conn:
+            assert conn.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+            assert conn.exec_driver_sql('PRAGMA synchronous').scalar() == 1
+            assert conn.exec_driver_sql('PRAGMA busy_timeout').scalar() == 5000
+
+        # A writer holding the database exclusively must not stall readers.
+        writer = db.engine.raw_connection()
+        try:
+            writer.execute('BEGIN EXCLUSIVE')
+            writer.execute("INSERT INTO categories (name) VALUES ('Pets')")
+            with db.engine.connect() as reader:
+                reader.exec_driver_sql('PRAGMA busy_timeout=0')
+                assert reader.exec_driver_sql('SELECT count(*) FROM categories').scalar() == 0
+        finally:
+            writer.rollback()
+            writer.close()
+        db.engine.dispose()
+
+
+def test_json_provider_matches_default_encoding(client, auth_headers):
+    from datetime import date
+    from decimal import Decimal
+    from flask.json.provider import DefaultJSONProvider
+    from services.serializers import ORJSONProvider
+    assert isinstance(app.json, ORJSONProvider)
+
+    payloads = [
+        [{'id': 1, 'amount': 0.3, 'description': None, 'currency': 'KES'}],
+        {'b': [1.5, 100.0, -0.0, 2 ** 70], 'a': {'z': True, 'y': 'tab\there "quoted"'}},
+        {'text': 'Café ☕  ', 'ctl': '\x00\x1f\x7f'},
+        {'floats': [1e16, 1e-05, 0.0001, 123456.78]},
+        {'when': date(2026, 5, 2), 'price': Decimal('1.10')},
+        {2: 'int keys', 1: 'sorted as strings'},
+    ]
+    default = DefaultJSONProvider(app)
+    with app.app_context():
+        for payload in payloads:
+            assert app.json.response(payload).get_data() == default.response(payload).get_data()
+
+    client.post('/api/expenses', json={'category_id': 1, 'amount': 12.5, 'date': '2026-05-02', 'description': 'Matatu'},
+                headers=auth_headers)
+    body = client.get('/api/expenses', headers=auth_headers).get_data()
+    assert b'"currency":"KES","date":"2026-05-02","description":"Matatu"' in body
+    assert body.endswith(b'}]\n')
+
+
+def test_list_conditional_get_and_compression(client, auth_headers):
+    import gzip
+    client.post('/api/budgets', json={'amount': 1000, 'month': '2026-05'}, headers=auth_headers)
+    first = client.get('/api/budgets', headers=auth_headers)
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+
+    response = client.get('/api/budgets', headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert '"1 queries"' in response.headers['Server-Timing']
+    # Each filter combination has its own tag.
+    assert client.get('/api/expenses', headers=auth_headers).headers['ETag'] != etag
+
+    client.post('/api/expenses', json={'category_id': 1, 'amount': 5, 'date': '2026-05-02'}, headers=auth_headers)
+    assert client.get('/api/budgets', headers={**auth_headers, 'If-None-Match': etag}).status_code == 200
+
+    for day in range(1, 29):
+        client.post('/api/expenses', json={'category_id': 1, 'amount': 5, 'date': f'2026-05-{day:02d}'},
+                    headers=auth_headers)
+    plain = client.get('/api/expenses', headers=auth_headers)
+    assert 'Content-Encoding' not in plain.headers
+    zipped = client.get('/api/expenses', headers={**auth_headers, 'Accept-Encoding': 'gzip'})
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in zipped.headers['Vary']
+    assert gzip.decompress(zipped.get_data()) == plain.get_data()
+
+
+def test_budget_vs_actual_per_category(client, auth_headers):
+    client.post('/api/budgets', json={'amount': 1000, 'month': '2026-05'}, headers=auth_headers)
+    client.post('/api/budgets', json={'amount': 300, 'month': '2026-05', 'category_id': 1}, headers=auth_headers)
+    client.post('/api/budgets', json={'amount': 100, 'month': '2026-05', 'category_id': 3}, headers=auth_headers)
+    client.post('/api/budgets', json={'amount': 50, 'month': '2026-06', 'category_id': 3}, headers=auth_headers)
+    client.post('/api/expenses', json={'category_id': 1, 'amount': 120, 'date': '2026-05-02'}, headers=auth_headers)
+    client.post('/api/expenses', json={'category_id': 3, 'amount': 150, 'date': '2026-05-03'}, headers=auth_headers)
+    client.post('/api/expenses', json={'category_id': 5, 'amount': 30, 'date': '2026-05-04'}, headers=auth_headers)
+
+    data = client.get('/api/reports/budget-vs-actual?month=2026-05', headers=auth_headers).get_json()
+    assert [(b['category_id'], b['budget'], b['spent'], b['remaining'], b['percent_used'], b['overspent'])
+            for b in data['budgets']] == [
+        (None, 1000, 300, 700, 30.0, False),
+        (1, 300, 120, 180, 40.0, False),
+        (3, 100, 150, -50, 150.0, True),
+    ]
+
+    # The overall budget is the month's budget; without one, category budgets add up.
+    assert client.get('/api/dashboard?month=2026-05', headers=auth_headers).get_json()['total_budget'] == 1000
+    assert client.get('/api/dashboard', headers=auth_headers).get_json()['total_budget'] == 1050
+
+    for category_id in (999, [1], {'id': 1}, True):
+        response = client.post('/api/budgets', json={'amount': 5, 'month': '2026-05', 'category_id': category_id},
+                               headers=auth_headers)
+        assert response.status_code == 400
+
+
+def test_recurring_expenses_and_budget_templates(client, auth_headers):
+    from services import recurring
+    response = client.post('/api/recurring-expenses', json={
+        'category_id': 2, 'amount': 25000, 'description': 'Rent',
+        'rule': 'FREQ=MONTHLY;COUNT=3', 'start_date': '2020-01-31'
+    }, headers=auth_headers)
+    assert response.status_code == 201
+    assert response.get_json()['next_date'] is None
+    client.post('/api/recurring-expenses', json={
+        'category_id': 4, 'amount': 500, 'rule': 'FREQ=MONTHLY;BYMONTHDAY=1;UNTIL=20200401', 'start_date': '2020-01-15'
+    }, headers=auth_headers)
+
+    expenses = client.get('/api/expenses', headers=auth_headers).get_json()
+    assert sorted((e['date'], e['amount']) for e in expenses) == [
+        ('2020-01-31', 25000), ('2020-02-01', 500), ('2020-02-29', 25000),
+        ('2020-03-01', 500), ('2020-03-31', 25000), ('2020-04-01', 500),
+    ]
+    assert client.get('/api/dashboard?month=2020-02', headers=auth_headers).get_json()['total_spent'] == 25500
+
+    client.post('/api/budget-templates', json={'amount': 30000, 'rule': 'FREQ=MONTHLY;COUNT=2', 'start_month': '2020-01'},
+                headers=auth_headers)
+    budgets = client.get('/api/budgets', headers=auth_headers).get_json()
+    assert sorted((b['month'], b['amount'], b['category_id']) for b in budgets) == [
+        ('2020-01', 30000, None), ('2020-02', 30000, None)
+    ]
+
+    # Reruns, e.g. from another worker or after a restart, create nothing new.
+    with app.app_context():
+        assert recurring.run() == (0, 0)
+    assert len(client.get('/api/expenses', headers=auth_headers).get_json()) == 6
+
+    response = client.post('/api/recurring-expenses', json={'category_id': 2, 'amount': 1, 'rule': 'FREQ=HOURLY'},
+                           headers=auth_headers)
+    assert response.status_code == 400
+    response = client.post('/api/recurring-expenses', json={'category_id': [2], 'amount': 1, 'rule': 'FREQ=DAILY'},
+                           headers=auth_headers)
+    assert response.status_code == 400
+    response = client.post('/api/budget-templates', json={'amount': 1, 'category_id': {'id': 2}}, headers=auth_headers)
+    assert response.status_code == 400
+
+    # Deep backfills are refused instead of being materialized inside the request.
+    response = client.post('/api/recurring-expenses', json={
+        'category_id': 2, 'amount': 1, 'rule': 'FREQ=DAILY', 'start_date': '1900-01-01'
+    }, headers=auth_headers)
+    assert response.status_code == 400
+    response = client.post('/api/budget-templates', json={'amount': 1, 'start_month': '1900-01'}, headers=auth_headers)
+    assert response.status_code == 400
+
+    # Claims take at most max_catchup occurrences per batch; later batches finish the rest.
+    with app.app_context():
+        from datetime import date
+        from models.models import RecurringExpense, User
+        user_id = db.session.scalar(db.select(User.id))
+        db.session.add(RecurringExpense(user_id=user_id, category_id=3, amount_cents=100, rule='FREQ=DAILY',
+                                        start_date=date(2021, 1, 1), next_date=date(2021, 1, 1)))
+        db.session.commit()
+        recurring.max_catchup = 4
+        try:
+            assert recurring.run(through=date(2021, 1, 10)) == (10, 0)
+        finally:
+            recurring.max_catchup = 366
+
+
+def test_search_expense_descriptions(client, auth_headers):
+    for category_id, amount, day, description in [
+        (1, 350, '2026-05-02', 'Lunch at Java Cafe'),
+        (1, 200, '2026-05-09', 'Cafe latte'),
+        (3, 100, '2026-06-01', 'Matatu to cafe'),
+        (1, 80, '2026-05-10', 'Groceries'),
+    ]:
+        client.post('/api/expenses', json={'category_id': category_id, 'amount': amount, 'date': day,
+                                           'description': description}, headers=auth_headers)
+    other = client.post('/api/register', json={'username': 'other', 'email': 'other@example.com',
+                                               'password': 'password123'}).get_json()['token']
+    client.post('/api/expenses', json={'category_id': 1, 'amount': 1, 'description': 'Cafe'},
+                headers={'Authorization': f'Bearer {other}'})
+
+    def search(query):
+        return [e['description'] for e in client.get(f'/api/expenses/search?{query}', headers=auth_headers)
+                .get_json()['expenses']]
+
+    assert sorted(search('q=caf')) == ['Cafe latte', 'Lunch at Java Cafe', 'Matatu to cafe']
+    assert search('q=java+caf') == ['Lunch at Java Cafe']
+    assert sorted(search('q=cafe&month=2026-05&category_id=1')) == ['Cafe latte', 'Lunch at Java Cafe']
+    assert search('q=AND') == []
+
+    expense_id = client.get('/api/expenses?month=2026-05&category_id=1&min_amount=300', headers=auth_headers)\
+        .get_json()[0]['id']
+    client.put(f'/api/expenses/{expense_id}', json={'description': 'Dinner'}, headers=auth_headers)
+    assert search('q=dinner') == ['Dinner']
+    client.delete(f'/api/expenses/{expense_id}', headers=auth_headers)
+    assert search('q=dinner') == []
+    assert client.get('/api/expenses/search?q=+', headers=auth_headers).status_code == 400
+
+
+def test_insights_report(client, auth_headers):
+    def add(category_id, amount, day):
+        client.post('/api/expenses', json={'category_id': category_id, 'amount': amount, 'date': day},
+                    headers=auth_headers)
+
+    for day, amount in zip((3, 8, 12, 19, 25), (100, 110, 90, 105, 95)):
+        add(1, amount, f'2025-04-{day:02d}')
+    add(1, 100, '2025-05-02')
+    add(1, 1000, '2025-05-20')
+    add(3, 60, '2025-05-21')
+
+    data = client.get('/api/reports/insights?month=2025-05', headers=auth_headers).get_json()
+    assert data['as_of'] == '2025-05-31'
+    assert data['projection'] == {'spent_to_date': 1160, 'projected_total': 1160, 'days_elapsed': 31,
+                                  'days_in_month': 31}
+    assert data['rolling_average']['30d'] == round(1160 / 30, 2)
+    assert data['percentiles']['p50'] == 100
+    assert [(c['category_id'], c['current'], c['previous'], c['delta']) for c in data['categories']] == [
+        (1, 1100, 500, 600), (3, 60, 0, 60)
+    ]
+    assert [(o['amount'], o['methods']) for o in data['outliers']] == [(1000, ['iqr'])]
+
+    response = client.get('/api/reports/insights?month=2025-05', headers=auth_headers)
+    assert '"1 queries"' in response.headers['Server-Timing']
+    add(3, 40, '2025-05-22')
+    data = client.get('/api/reports/insights?month=2025-05', headers=auth_headers).get_json()
+    assert data['projection']['spent_to_date'] == 1200
+
+
+def test_batch_operations(client, auth_headers):
+    expense = client.post('/api/expenses', json={'category_id': 1, 'amount': 100, 'date': '2026-05-02'},
+                          headers=auth_headers).get_json()
+    budget = client.post('/api/budgets', json={'amount': 1000, 'month': '2026-05'}, headers=auth_headers).get_json()
+    other = client.post('/api/register', json={'username': 'other', 'email': 'other@example.com',
+                                               'password': 'password123'}).get_json()['token']
+    foreign = client.post('/api/expenses', json={'category_id': 1, 'amount': 5, 'date': '2026-05-02'},
+                          headers={'Authorization': f'Bearer {other}'}).get_json()
+
+    operations = [
+        {'op': 'create', 'type': 'expense', 'data': {'category_id': 3, 'amount': 40, 'date': '2026-05-03'}},
+        {'op': 'update', 'type': 'expense', 'id': expense['id'], 'data': {'amount': 150}},
+        {'op': 'update', 'type': 'budget', 'id': budget['id'], 'data': {'amount': 1200}},
+        {'op': 'delete', 'type': 'expense', 'id': foreign['id']},
+    ]
+    response = client.post('/api/batch', json={'operations': operations}, headers=auth_headers)
+    assert response.status_code == 404
+    assert response.get_json()['committed'] is False
+    assert client.get('/api/dashboard?month=2026-05', headers=auth_headers).get_json()['total_spent'] == 100
+
+    response = client.post('/api/batch', json={'mode': 'best_effort', 'operations': operations}, headers=auth_headers)
+    body = response.get_json()
+    assert body['committed'] is True
+    assert [r['status'] for r in body['results']] == [201, 200, 200, 404]
+    assert client.get('/api/dashboard?month=2026-05', headers=auth_headers).get_json() == {
+        'month': '2026-05', 'total_budget': 1200, 'total_spent': 190, 'remaining': 1010
+    }
+
+    response = client.post('/api/batch', json={'operations': [
+        {'op': 'delete', 'type': 'expense', 'id': expense['id']},
+        {'op': 'delete', 'type': 'budget', 'id': budget['id']},
+    ]}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['committed'] is True
+    assert client.get('/api/dashboard?month=2026-05', headers=auth_headers).get_json()['total_spent'] == 40
+    with app.app_context():
+        from services import rollup
+        assert rollup.verify() == []
+
+    response = client.post('/api/batch', json={'operations': [{'op': 'merge', 'type': 'expense'}]},
+                           headers=auth_headers)
+    assert response.status_code == 400
+
+    malformed = [
+        {'op': 'create', 'type': 'expense', 'data': {'category_id': [1], 'amount': 1}},
+        {'op': 'create', 'type': 'expense', 'data': {'category_id': True, 'amount': 1}},
+        {'op': 'create', 'type': 'expense', 'data': {'category_id': 1, 'amount': 1, 'date': 20260501}},
+        {'op': 'create', 'type': 'budget', 'data': {'amount': 1, 'month': '2026-05', 'category_id': {}}},
+        {'op': 'delete', 'type': 'expense', 'id': True},
+    ]
+    for operation in malformed:
+        response = client.post('/api/batch', json={'operations': [operation]}, headers=auth_headers)
+        assert response.status_code == 400, operation
+    for body in ([], 'atomic', None):
+        assert client.post('/api/batch', json=body, headers=auth_headers).status_code == 400
+    assert client.post('/api/batch', data='{', headers=auth_headers).status_code == 400
+
+    response = client.post('/api/batch', json={'operations': [
+        {'op': 'create', 'type': 'budget', 'data': {'amount': 10, 'month': '2026-1'}},
+    ]}, headers=auth_headers)
+    assert response.get_json()['results'][0]['data']['month'] == '2026-01'
+
+
+def test_sync_change_feed(client, auth_headers):
+    initial = client.get('/api/sync', headers=auth_headers).get_json()
+    assert initial == {'seq': 0, 'reset': False, 'has_more': False, 'cursor': None, 'expenses': [],
+                       'budgets': [], 'deleted': {'expenses': [], 'budgets': []}}
+
+    kept = client.post('/api/expenses', json={'category_id': 1, 'amount': 10, 'date': '2026-05-01'},
+                       headers=auth_headers).get_json()
+    dropped = client.post('/api/expenses', json={'category_id': 1, 'amount': 20, 'date': '2026-05-02'},
+                          headers=auth_headers).get_json()
+    budget = client.post('/api/budgets', json={'amount': 500, 'month': '2026-05'}, headers=auth_headers).get_json()
+    first = client.get('/api/sync?since=0', headers=auth_headers).get_json()
+    assert first['seq'] == 3
+    assert [e['id'] for e in first['expenses']] == [kept['id'], dropped['id']]
+    assert [b['id'] for b in first['budgets']] == [budget['id']]
+    assert first['expenses'][0]['updated_at']
+
+    unchanged = client.get(f"/api/sync?since={first['seq']}", headers=auth_headers).get_json()
+    assert unchanged['seq'] == 3 and unchanged['expenses'] == [] and unchanged['deleted']['expenses'] == []
+
+    client.put(f"/api/expenses/{kept['id']}", json={'amount': 15}, headers=auth_headers)
+    client.delete(f"/api/expenses/{dropped['id']}", headers=auth_headers)
+    client.post('/api/batch', json={'operations': [{'op': 'delete', 'type': 'budget', 'id': budget['id']}]},
+                headers=auth_headers)
+    second = client.get(f"/api/sync?since={first['seq']}", headers=auth_headers).get_json()
+    assert second['seq'] == 6
+    assert [(e['id'], e['amount']) for e in second['expenses']] == [(kept['id'], 15)]
+    assert second['budgets'] == []
+    assert second['deleted'] == {'expenses': [dropped['id']], 'budgets': [budget['id']]}
+
+    ahead = client.get('/api/sync?since=99', headers=auth_headers).get_json()
+    assert ahead['reset'] is True and [e['id'] for e in ahead['expenses']] == [kept['id']]
+    assert client.get('/api/sync?since=abc', headers=auth_headers).status_code == 400
+
+    # Pages walk deletions, expenses, then budgets, with the version range pinned by the cursor.
+    client.post('/api/expenses/bulk', json=[{'category_id': 2, 'amount': i + 1} for i in range(5)],
+                headers=auth_headers)
+    client.post('/api/budgets', json={'amount': 10, 'month': '2026-06'}, headers=auth_headers)
+    seen, deleted, cursor = [], [], None
+    while True:
+        url = f"/api/sync?since={first['seq']}&limit=3" + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(url, headers=auth_headers).get_json()
+        assert len(page['expenses']) + len(page['budgets']) + sum(map(len, page['deleted'].values())) <= 3
+        seen += [('e', e['id']) for e in page['expenses']] + [('b', b['id']) for b in page['budgets']]
+        deleted += page['deleted']['expenses'] + page['deleted']['budgets']
+        if not page['has_more']:
+            break
+        cursor = page['cursor']
+        client.post('/api/expenses', json={'category_id': 1, 'amount': 1}, headers=auth_headers)
+    assert page['seq'] == 8 and deleted == [dropped['id'], budget['id']]
+    assert len(seen) == 7 and len(set(seen)) == 7
+    assert client.get('/api/sync?cursor=bogus', headers=auth_headers).status_code == 400
+
+    with app.app_context():
+        from db.synthetic import generate
+        user_ids = generate(users=2, expenses=20, years=1, echo=lambda *args: None)
+    login = client.post('/api/login', json={'email': f'synthetic{user_ids[0]}@example.com', 'password': 'password'})
+    synthetic = client.get('/api/sync', headers={'Authorization': f"Bearer {login.get_json()['token']}"}).get_json()
+    assert synthetic['seq'] == 1 and synthetic['expenses'] and synthetic['budgets']
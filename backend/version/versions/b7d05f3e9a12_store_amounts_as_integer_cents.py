@@ -0,0 +1,52 @@
+"""Store amounts as integer cents
+
+Revision ID: b7d05f3e9a12
+Revises: 8c41e2a9b5d3
+Create Date: 2026-10-18 11:40:09.734455
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d05f3e9a12'
+down_revision = '8c41e2a9b5d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('budgets', 'expenses'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('amount_cents', sa.BigInteger(), nullable=True))
+            batch_op.add_column(sa.Column('currency', sa.String(length=3), nullable=False, server_default='KES'))
+        op.execute(f'UPDATE {table} SET amount_cents = CAST(ROUND(amount * 100) AS BIGINT)')
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('amount_cents', existing_type=sa.BigInteger(), nullable=False)
+            batch_op.drop_column('amount')
+
+    with op.batch_alter_table('monthly_spend', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_cents', sa.BigInteger(), nullable=True))
+    op.execute('UPDATE monthly_spend SET total_cents = CAST(ROUND(total * 100) AS BIGINT)')
+    with op.batch_alter_table('monthly_spend', schema=None) as batch_op:
+        batch_op.alter_column('total_cents', existing_type=sa.BigInteger(), nullable=False)
+        batch_op.drop_column('total')
+
+
+def downgrade():
+    with op.batch_alter_table('monthly_spend', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total', sa.Float(), nullable=True))
+    op.execute('UPDATE monthly_spend SET total = total_cents / 100.0')
+    with op.batch_alter_table('monthly_spend', schema=None) as batch_op:
+        batch_op.alter_column('total', existing_type=sa.Float(), nullable=False)
+        batch_op.drop_column('total_cents')
+
+    for table in ('expenses', 'budgets'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('amount', sa.Float(), nullable=True))
+        op.execute(f'UPDATE {table} SET amount = amount_cents / 100.0')
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('amount', existing_type=sa.Float(), nullable=False)
+            batch_op.drop_column('currency')
+            batch_op.drop_column('amount_cents')
@@ -0,0 +1,57 @@
+"""Add full-text search index on expense descriptions
+
+Revision ID: e6f1b3a8c0d4
+Revises: 5b8e2d4f6a31
+Create Date: 2026-10-18 17:12:30.448051
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f1b3a8c0d4'
+down_revision = '5b8e2d4f6a31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        op.execute(
+            "CREATE INDEX ix_expenses_description_fts ON expenses "
+            "USING gin (to_tsvector('simple'::regconfig, coalesce(description, '')))"
+        )
+        return
+
+    # FTS5 table kept in sync by triggers; see services/search.py.
+    op.execute("CREATE VIRTUAL TABLE expenses_fts USING fts5(owner, description, prefix='2 3')")
+    op.execute(
+        "CREATE TRIGGER expenses_fts_insert AFTER INSERT ON expenses BEGIN "
+        "INSERT INTO expenses_fts (rowid, owner, description) "
+        "VALUES (new.id, 'u' || new.user_id, coalesce(new.description, '')); END"
+    )
+    op.execute(
+        "CREATE TRIGGER expenses_fts_delete AFTER DELETE ON expenses BEGIN "
+        "DELETE FROM expenses_fts WHERE rowid = old.id; END"
+    )
+    op.execute(
+        "CREATE TRIGGER expenses_fts_update AFTER UPDATE OF user_id, description ON expenses BEGIN "
+        "UPDATE expenses_fts SET owner = 'u' || new.user_id, description = coalesce(new.description, '') "
+        "WHERE rowid = new.id; END"
+    )
+    op.execute(
+        "INSERT INTO expenses_fts (rowid, owner, description) "
+        "SELECT id, 'u' || user_id, coalesce(description, '') FROM expenses"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        op.execute('DROP INDEX ix_expenses_description_fts')
+        return
+
+    op.execute('DROP TRIGGER expenses_fts_update')
+    op.execute('DROP TRIGGER expenses_fts_delete')
+    op.execute('DROP TRIGGER expenses_fts_insert')
+    op.execute('DROP TABLE expenses_fts')
@@ -21,3 +21,28 @@ export const deleteExpense = async (expenseId) => {
   const response = await api.delete(`/expenses/${expenseId}`);
   return response.data;
 };
+
+// Fetch one page of expenses. Pass the previous page's next_cursor to continue.
+export const fetchExpensePage = async (params = {}) => {
+  const response = await api.get('/expenses', { params: { limit: 50, ...params } });
+  return response.data;
+};
+
+// Fetch expenses and budgets changed since the seq returned by the previous sync (0 for everything).
+// Pages are followed until has_more is false; apply `deleted` before the upserts.
+export const syncChanges = async (since = 0) => {
+  const changes = { expenses: [], budgets: [], deleted: { expenses: [], budgets: [] } };
+  let cursor;
+  let page;
+  do {
+    const response = await api.get('/sync', { params: { since, cursor } });
+    page = response.data;
+    changes.expenses.push(...page.expenses);
+    changes.budgets.push(...page.budgets);
+    changes.deleted.expenses.push(...page.deleted.expenses);
+    changes.deleted.budgets.push(...page.deleted.budgets);
+    changes.reset = changes.reset || page.reset;
+    cursor = page.cursor;
+  } while (page.has_more);
+  return { ...changes, seq: page.seq };
+};